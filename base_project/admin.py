@@ -9,7 +9,11 @@ from django.db.models import OneToOneField, ForeignKey
 from django.forms import ModelForm
 from django.forms.formsets import all_valid
 from django.forms.models import BaseModelFormSet, modelformset_factory
-from django.urls import reverse
+from django.conf import settings
+from django.contrib import messages
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import reverse, path
 from django.utils.html import format_html
 from django.utils.encoding import force_str
 from django.utils.safestring import mark_safe
@@ -19,6 +23,9 @@ from adminsortable2.admin import SortableAdminMixin as BaseSortableAdminMixin
 from adminsortable2.admin import SortableTabularInline, SortableInlineAdminMixin
 
 from base_project import models
+from base_project import profiler
+from base_project import cache_stats
+from base_project.caching import bump_generation
 from base_project.utils import get_client_ip
 from base_project.forms import OrderForm
 
@@ -332,5 +339,61 @@ class AdminSite(admin.AdminSite):
 
         return app_list
 
+    def get_urls(self):
+        urls = []
+
+        if settings.PROFILER:
+            urls += [
+                path('profiles/', self.admin_view(self.profile_list_view), name='profile_list'),
+                path('profiles/<str:filename>/', self.admin_view(self.profile_download_view), name='profile_download'),
+            ]
+
+        if settings.CACHE_STATS:
+            urls += [
+                path('caches/', self.admin_view(self.cache_stats_view), name='cache_stats'),
+            ]
+
+        return urls + super().get_urls()
+
+    def profile_list_view(self, request):
+        """
+        저장된 profiling 결과 목록과 profiling token 표시
+        """
+        context = {
+            **self.each_context(request),
+            "title": "Profiles",
+            "profiles": profiler.get_profiles(),
+            "token": profiler.make_token(request.user),
+            "token_max_age": settings.PROFILER_TOKEN_MAX_AGE,
+        }
+
+        return TemplateResponse(request, "admin/profile_list.html", context)
+
+    def profile_download_view(self, request, filename):
+        if not (profile_path := profiler.get_profile_path(filename)):
+            raise Http404
+
+        return FileResponse(open(profile_path, "rb"), as_attachment=True, filename=filename)
+
+    def cache_stats_view(self, request):
+        """
+        caching_view / caching_model_method의 namespace 별 통계
+        POST 요청 시 해당 namespace의 generation을 증가시켜 캐싱 데이터 무효화
+        """
+        if request.method == "POST":
+            if namespace := request.POST.get("namespace"):
+                bump_generation(namespace)
+                messages.success(request, f"{namespace} 캐싱 데이터를 무효화했습니다.")
+
+            return HttpResponseRedirect(request.path)
+
+        context = {
+            **self.each_context(request),
+            "title": "Cache",
+            "stats": cache_stats.get_stats(),
+        }
+
+        return TemplateResponse(request, "admin/cache_stats.html", context)
+
 
 site = AdminSite()
@@ -1,3 +1,5 @@
+from django.apps import AppConfig
+
 from suit.apps import DjangoSuitConfig
 from suit.menu import ParentItem, ChildItem
 
@@ -40,3 +42,12 @@ class SuitConfig(DjangoSuitConfig):
         from django.contrib.auth import user_logged_in
         from django.contrib.auth.models import update_last_login
         user_logged_in.disconnect(update_last_login)
+
+
+class BaseProjectConfig(AppConfig):
+    """ management command, template 등록 및 캐싱 데이터 무효화 signal 연결 """
+    name = 'base_project'
+
+    def ready(self):
+        from base_project import caching
+        caching.connect_signals()
@@ -0,0 +1,674 @@
+import os
+import mmap
+import time
+import zlib
+import uuid
+import pickle
+import struct
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from base_project.logger import logger
+from base_project.cache_serializer import UnsupportedVersion
+
+CLEAR_ALL = "*"
+MISSING = object()
+
+SHM_MAGIC = b"BPSHMC02"
+# magic, 영역 수, 영역 당 slot 수, slot 크기
+SHM_HEADER = struct.Struct("=8sIII")
+# key hash, 만료 시각(0이면 만료 없음), 마지막 사용 시각, key 길이, 값 길이
+SLOT_HEADER = struct.Struct("=QddII")
+# 저장된 값의 첫 byte
+VALUE_RAW = b"\x00"
+VALUE_COMPRESSED = b"\x01"
+
+
+class LocalLRU:
+    """
+    process 안에서 사용하는 크기 / 유지 시간 제한이 있는 LRU
+    값은 pickle 된 상태로 보관하여 조회한 곳에서 값을 수정해도 다른 요청에 영향이 없도록 함
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if (item := self._data.get(key)) is None:
+                return None
+
+            if item[1] <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value, timeout=None):
+        # redis의 timeout보다 오래 보관하지 않음
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        if timeout <= 0:
+            return self.delete(key)
+
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBroker:
+    """ redis pub/sub으로 invalidation message 전달 """
+
+    def __init__(self, cache, channel):
+        self.cache = cache
+        self.channel = channel
+
+    def publish(self, message):
+        self.cache._cache.get_client(write=True).publish(self.channel, message)
+
+    def subscribe(self, callback):
+        thread = threading.Thread(target=self._listen, args=(callback, ), name="cache-invalidation", daemon=True)
+        thread.start()
+
+    def _listen(self, callback):
+        while True:
+            try:
+                pubsub = self.cache._cache.get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+
+                # 연결이 끊긴 동안의 message는 받을 수 없으므로 재연결 시 전체 삭제
+                callback(f":{CLEAR_ALL}")
+
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        callback(message["data"].decode())
+
+            except Exception:
+                time.sleep(1)
+
+
+class LocalBroker:
+    """ 테스트용 in-process broker, 같은 channel을 subscribe 한 backend에 즉시 전달 """
+    subscribers = defaultdict(list)
+
+    def __init__(self, cache, channel):
+        self.channel = channel
+
+    def publish(self, message):
+        for callback in self.subscribers[self.channel]:
+            callback(message)
+
+    def subscribe(self, callback):
+        self.subscribers[self.channel].append(callback)
+
+
+class VersionedRedisCacheClient(RedisCacheClient):
+    """ serializer가 읽을 수 없는 version의 값(UnsupportedVersion)은 cache miss로 처리 """
+
+    def get(self, key, default):
+        try:
+            return super().get(key, default)
+        except UnsupportedVersion:
+            return default
+
+    def get_many(self, keys):
+        client = self.get_client(None)
+        result = {}
+
+        for key, value in zip(keys, client.mget(keys)):
+            if value is None:
+                continue
+
+            try:
+                result[key] = self._serializer.loads(value)
+            except UnsupportedVersion:
+                pass
+
+        return result
+
+
+class VersionedRedisCache(RedisCache):
+    """
+    cache_serializer.CacheSerializer와 함께 사용하는 RedisCache
+    rolling deploy 중 다른 version의 worker가 저장한 값은 cache miss로 처리
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._class = VersionedRedisCacheClient
+
+
+class TwoTierRedisCache(VersionedRedisCache):
+    """
+    RedisCache 앞에 worker(process) 별 LRU를 두는 cache backend
+    hot key는 redis 왕복 없이 process 메모리에서 응답하며,
+    값이 변경되면 pub/sub으로 다른 worker의 LRU에서 해당 key를 삭제
+
+    message가 유실되더라도 LOCAL_TIMEOUT 이상 이전 값을 응답하지 않음
+    lock / 존재 여부 확인(add, has_key)은 항상 redis에서 처리
+
+    Example:
+        CACHES = {
+            "default": {
+                "BACKEND": "base_project.cache_backends.TwoTierRedisCache",
+                "LOCATION": "redis://localhost:6379",
+                "OPTIONS": {
+                    "LOCAL_MAX_ENTRIES": 1000,  # worker 별 LRU 최대 key 수
+                    "LOCAL_TIMEOUT": 5,  # worker 별 LRU 최대 유지 시간(초)
+                    "BROKER": "base_project.cache_backends.RedisBroker",  # 테스트 시 LocalBroker
+                    "CHANNEL": "cache-invalidation",
+                },
+            }
+        }
+    """
+
+    def __init__(self, server, params):
+        options = dict(params.get("OPTIONS", {}))
+        max_entries = options.pop("LOCAL_MAX_ENTRIES", 1000)
+        local_timeout = options.pop("LOCAL_TIMEOUT", 5)
+        broker_class = options.pop("BROKER", "base_project.cache_backends.RedisBroker")
+        channel = options.pop("CHANNEL", "cache-invalidation")
+
+        super().__init__(server, {**params, "OPTIONS": options})
+
+        self._local = LocalLRU(max_entries, local_timeout)
+        self._broker = import_string(broker_class)(self, channel)
+        self._node_id = None
+        self._pid = None
+        self._subscribe_lock = threading.Lock()
+
+    def _ensure_subscribed(self):
+        # gunicorn worker는 fork 이후 thread를 새로 시작해야 하므로 pid가 바뀌면 다시 subscribe
+        if self._pid == os.getpid():
+            return
+
+        with self._subscribe_lock:
+            if self._pid == os.getpid():
+                return
+
+            self._local.clear()
+            self._node_id = uuid.uuid4().hex
+            self._broker.subscribe(self._on_message)
+            self._pid = os.getpid()
+
+    def _on_message(self, message):
+        node_id, _, key = message.partition(":")
+        if node_id == self._node_id:
+            return
+
+        if key == CLEAR_ALL:
+            self._local.clear()
+        else:
+            self._local.delete(key)
+
+    def _invalidate(self, *keys):
+        for key in keys:
+            self._local.delete(key)
+            self._broker.publish(f"{self._node_id}:{key}")
+
+    def get(self, key, default=None, version=None):
+        self._ensure_subscribed()
+        key = self.make_and_validate_key(key, version=version)
+
+        if (value := self._local.get(key)) is not None:
+            return pickle.loads(value)
+
+        value = self._cache.get(key, None)
+        if value is None:
+            return default
+
+        self._local.set(key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._ensure_subscribed()
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        result = {}
+        missing = []
+
+        for key in key_map:
+            if (value := self._local.get(key)) is not None:
+                result[key_map[key]] = pickle.loads(value)
+            else:
+                missing.append(key)
+
+        if missing:
+            for key, value in self._cache.get_many(missing).items():
+                self._local.set(key, value)
+                result[key_map[key]] = value
+
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_subscribed()
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+
+        self._cache.set(key, value, timeout)
+        self._invalidate(key)
+        self._local.set(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_subscribed()
+        key = self.make_and_validate_key(key, version=version)
+
+        if added := self._cache.add(key, value, self.get_backend_timeout(timeout)):
+            self._invalidate(key)
+
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+
+        self._ensure_subscribed()
+        safe_data = {self.make_and_validate_key(key, version=version): value for key, value in data.items()}
+        timeout = self.get_backend_timeout(timeout)
+
+        self._cache.set_many(safe_data, timeout)
+        self._invalidate(*safe_data)
+        for key, value in safe_data.items():
+            self._local.set(key, value, timeout)
+
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_subscribed()
+        self._local.delete(self.make_and_validate_key(key, version=version))
+        return super().touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._ensure_subscribed()
+        key = self.make_and_validate_key(key, version=version)
+
+        deleted = self._cache.delete(key)
+        self._invalidate(key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        if not keys:
+            return
+
+        self._ensure_subscribed()
+        safe_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+
+        self._cache.delete_many(safe_keys)
+        self._invalidate(*safe_keys)
+
+    def incr(self, key, delta=1, version=None):
+        self._ensure_subscribed()
+        key = self.make_and_validate_key(key, version=version)
+
+        value = self._cache.incr(key, delta)
+        self._invalidate(key)
+        return value
+
+    def clear(self):
+        self._ensure_subscribed()
+        result = self._cache.clear()
+        self._local.clear()
+        self._broker.publish(f"{self._node_id}:{CLEAR_ALL}")
+        return result
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    같은 host의 모든 worker가 공유하는 mmap 파일 기반 cache backend (redis를 사용하지 않는 배포 환경용)
+
+    파일은 STRIPES개의 영역으로 나뉘며, 각 영역은 [slot header 목록][slot 데이터 목록]으로 구성
+    key는 hash에 따라 하나의 영역에 저장되고, 영역 단위로 thread lock + fcntl lock을 사용하므로
+    서로 다른 영역의 key는 동시에 읽고 쓸 수 있음
+    영역이 가득 차면 만료된 slot, 그다음 가장 오래 사용하지 않은 slot을 교체(LRU)
+
+    SLOT_SIZE보다 큰 값은 zlib으로 압축하여 저장하고, 압축 후에도 크면 저장하지 않음 (process 당 한 번 warning)
+    파일은 tmpfs(/dev/shm)에 두면 실제 사용한 page만 메모리를 사용
+    파일 이름에 영역 / slot 설정을 포함하므로, 설정이 다른 worker(rolling deploy 등)는 서로 다른 파일을 사용
+
+    Example:
+        CACHES = {
+            "default": {
+                "BACKEND": "base_project.cache_backends.SharedMemoryCache",
+                "LOCATION": "/dev/shm/base_project_cache",
+                "OPTIONS": {
+                    "MAX_ENTRIES": 1024,
+                    "STRIPES": 16,
+                    "SLOT_SIZE": 64 * 1024,  # key + pickle 된 값의 최대 크기(byte)
+                },
+            }
+        }
+    """
+
+    def __init__(self, location, params):
+        if fcntl is None:
+            raise ImproperlyConfigured("SharedMemoryCache requires fcntl (posix only).")
+
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+
+        self._stripes = int(options.get("STRIPES", 16))
+        self._slots = max(1, -(-self._max_entries // self._stripes))
+        self._slot_size = int(options.get("SLOT_SIZE", 64 * 1024)) // 8 * 8
+        self._stripe_size = self._slots * (SLOT_HEADER.size + self._slot_size)
+        self._capacity = SHM_HEADER.size + self._stripes * self._stripe_size
+        self._path = f"{location}.{self._stripes}x{self._slots}x{self._slot_size}"
+
+        self._pid = None
+        self._warned_size = False
+        self._init_lock = threading.Lock()
+
+    def _open(self):
+        # fork 된 worker에서는 thread lock을 새로 생성
+        if self._pid == os.getpid():
+            return
+
+        with self._init_lock:
+            if self._pid == os.getpid():
+                return
+
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._locks = [threading.Lock() for _ in range(self._stripes)]
+            header = SHM_HEADER.pack(SHM_MAGIC, self._stripes, self._slots, self._slot_size)
+
+            while (fd := self._open_file(header)) is None:
+                pass
+
+            self._fd = fd
+            self._m = mmap.mmap(self._fd, self._capacity)
+
+            self._pid = os.getpid()
+
+    def _open_file(self, header):
+        """
+        초기화된 파일의 fd, 다른 process가 파일을 교체하는 중이면 None (다시 open)
+        다른 version의 파일은 mmap 중인 process가 있을 수 있으므로 크기를 바꾸지 않고 삭제 후 새 파일 생성
+        """
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        opened = False
+
+        fcntl.lockf(fd, fcntl.LOCK_EX)
+        try:
+            # lock을 기다리는 동안 다른 process가 삭제 / 교체한 파일이면 새 파일을 다시 open
+            stat = os.fstat(fd)
+            try:
+                current = os.stat(self._path)
+            except FileNotFoundError:
+                return None
+
+            if (stat.st_dev, stat.st_ino) != (current.st_dev, current.st_ino):
+                return None
+
+            if stat.st_size == 0:
+                os.ftruncate(fd, self._capacity)
+                os.pwrite(fd, header, 0)
+
+            elif stat.st_size != self._capacity or os.pread(fd, SHM_HEADER.size, 0) != header:
+                os.unlink(self._path)
+                return None
+
+            opened = True
+            return fd
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+            if not opened:
+                os.close(fd)
+
+    @contextmanager
+    def _lock(self, stripe):
+        with self._locks[stripe]:
+            # 파일 앞부분의 byte 하나를 영역의 lock으로 사용 (process 간)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+    def _stripe_of(self, key_hash):
+        return key_hash % self._stripes
+
+    def _header_offset(self, stripe, slot):
+        return SHM_HEADER.size + stripe * self._stripe_size + slot * SLOT_HEADER.size
+
+    def _data_offset(self, stripe, slot):
+        return SHM_HEADER.size + stripe * self._stripe_size + self._slots * SLOT_HEADER.size + slot * self._slot_size
+
+    def _headers(self, stripe):
+        start = self._header_offset(stripe, 0)
+        return SLOT_HEADER.iter_unpack(self._m[start:start + self._slots * SLOT_HEADER.size])
+
+    def _find(self, stripe, key, key_hash):
+        """ key가 저장된 slot 번호와 만료 시각, 값의 길이 """
+        for slot, (slot_hash, expires, _, key_len, value_len) in enumerate(self._headers(stripe)):
+            if slot_hash != key_hash or key_len != len(key):
+                continue
+
+            offset = self._data_offset(stripe, slot)
+            if self._m[offset:offset + key_len] == key:
+                return slot, expires, value_len
+
+        return None, None, None
+
+    def _get(self, stripe, key, key_hash, now):
+        slot, expires, value_len = self._find(stripe, key, key_hash)
+        if slot is None:
+            return MISSING
+
+        if expires and expires <= now:
+            self._clear_slot(stripe, slot)
+            return MISSING
+
+        struct.pack_into("=d", self._m, self._header_offset(stripe, slot) + 16, now)
+        offset = self._data_offset(stripe, slot) + len(key)
+        value = self._m[offset:offset + value_len]
+        if value[:1] == VALUE_COMPRESSED:
+            return pickle.loads(zlib.decompress(value[1:]))
+
+        return pickle.loads(value[1:])
+
+    def _encode(self, key, value):
+        """ slot에 저장할 값, SLOT_SIZE를 넘으면 압축하고 그래도 크면 None """
+        value = VALUE_RAW + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(key) + len(value) <= self._slot_size:
+            return value
+
+        value = VALUE_COMPRESSED + zlib.compress(value[1:], 1)
+        if len(key) + len(value) <= self._slot_size:
+            return value
+
+        if not self._warned_size:
+            self._warned_size = True
+            logger.warning(
+                f"SharedMemoryCache value larger than SLOT_SIZE({self._slot_size}) is not cached : "
+                f"{key.decode()} ({len(value)} bytes compressed)"
+            )
+
+        return None
+
+    def _set(self, stripe, key, key_hash, value, expires, now):
+        value = self._encode(key, value)
+        slot = self._find(stripe, key, key_hash)[0]
+
+        if value is None:
+            if slot is not None:
+                self._clear_slot(stripe, slot)
+            return False
+
+        if slot is None:
+            slot = self._choose_slot(stripe, now)
+
+        offset = self._data_offset(stripe, slot)
+        self._m[offset:offset + len(key) + len(value)] = key + value
+        SLOT_HEADER.pack_into(
+            self._m, self._header_offset(stripe, slot), key_hash, expires or 0.0, now, len(key), len(value)
+        )
+        return True
+
+    def _choose_slot(self, stripe, now):
+        """ 빈 slot 또는 만료된 slot, 없으면 가장 오래 사용하지 않은 slot """
+        candidate, oldest = 0, None
+
+        for slot, (slot_hash, expires, accessed, _, _) in enumerate(self._headers(stripe)):
+            if not slot_hash or (expires and expires <= now):
+                return slot
+
+            if oldest is None or accessed < oldest:
+                candidate, oldest = slot, accessed
+
+        return candidate
+
+    def _clear_slot(self, stripe, slot):
+        SLOT_HEADER.pack_into(self._m, self._header_offset(stripe, slot), 0, 0.0, 0.0, 0, 0)
+
+    def _prepare(self, key, version):
+        key = self.make_and_validate_key(key, version=version).encode()
+        key_hash = self._hash(key)
+        return key, key_hash, self._stripe_of(key_hash)
+
+    def get(self, key, default=None, version=None):
+        self._open()
+        key, key_hash, stripe = self._prepare(key, version)
+
+        with self._lock(stripe):
+            value = self._get(stripe, key, key_hash, time.time())
+
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        self._open()
+        by_stripe = defaultdict(list)
+        for original in keys:
+            key, key_hash, stripe = self._prepare(original, version)
+            by_stripe[stripe].append((original, key, key_hash))
+
+        result = {}
+        now = time.time()
+        for stripe, items in by_stripe.items():
+            with self._lock(stripe):
+                for original, key, key_hash in items:
+                    if (value := self._get(stripe, key, key_hash, now)) is not MISSING:
+                        result[original] = value
+
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._open()
+        key, key_hash, stripe = self._prepare(key, version)
+
+        with self._lock(stripe):
+            self._set(stripe, key, key_hash, value, self.get_backend_timeout(timeout), time.time())
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._open()
+        by_stripe = defaultdict(list)
+        for original, value in data.items():
+            key, key_hash, stripe = self._prepare(original, version)
+            by_stripe[stripe].append((original, key, key_hash, value))
+
+        failed = []
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        for stripe, items in by_stripe.items():
+            with self._lock(stripe):
+                for original, key, key_hash, value in items:
+                    if not self._set(stripe, key, key_hash, value, expires, now):
+                        failed.append(original)
+
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._open()
+        key, key_hash, stripe = self._prepare(key, version)
+        now = time.time()
+
+        with self._lock(stripe):
+            if self._get(stripe, key, key_hash, now) is not MISSING:
+                return False
+
+            return self._set(stripe, key, key_hash, value, self.get_backend_timeout(timeout), now)
+
+    def incr(self, key, delta=1, version=None):
+        self._open()
+        key, key_hash, stripe = self._prepare(key, version)
+        now = time.time()
+
+        with self._lock(stripe):
+            if (value := self._get(stripe, key, key_hash, now)) is MISSING:
+                raise ValueError(f"Key '{key.decode()}' not found")
+
+            # 기존 만료 시각 유지
+            expires = self._find(stripe, key, key_hash)[1]
+            value += delta
+            self._set(stripe, key, key_hash, value, expires, now)
+
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._open()
+        key, key_hash, stripe = self._prepare(key, version)
+        now = time.time()
+
+        with self._lock(stripe):
+            if (value := self._get(stripe, key, key_hash, now)) is MISSING:
+                return False
+
+            return self._set(stripe, key, key_hash, value, self.get_backend_timeout(timeout), now)
+
+    def has_key(self, key, version=None):
+        self._open()
+        key, key_hash, stripe = self._prepare(key, version)
+
+        with self._lock(stripe):
+            slot, expires, _ = self._find(stripe, key, key_hash)
+
+        return slot is not None and not (expires and expires <= time.time())
+
+    def delete(self, key, version=None):
+        self._open()
+        key, key_hash, stripe = self._prepare(key, version)
+
+        with self._lock(stripe):
+            if (slot := self._find(stripe, key, key_hash)[0]) is None:
+                return False
+
+            self._clear_slot(stripe, slot)
+            return True
+
+    def clear(self):
+        self._open()
+        for stripe in range(self._stripes):
+            with self._lock(stripe):
+                start = self._header_offset(stripe, 0)
+                self._m[start:start + self._slots * SLOT_HEADER.size] = bytes(self._slots * SLOT_HEADER.size)
@@ -0,0 +1,131 @@
+import zlib
+import pickle
+from collections.abc import Mapping
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# [MAGIC][VERSION][FLAGS] + payload
+MAGIC = 0xBC
+VERSION = 1
+HEADER_SIZE = 3
+
+CODEC_PICKLE = 0
+CODEC_MSGPACK = 1
+FLAG_COMPRESSED = 0x80
+
+EXT_TUPLE = 1
+
+
+class UnsupportedType(Exception):
+    pass
+
+
+class UnsupportedVersion(Exception):
+    """ 다른 version의 CacheSerializer가 저장한 값, cache backend에서 cache miss로 처리 """
+
+
+def msgpack_default(obj):
+    # dict / list 하위 class(OrderedDict, ReturnDict, ReturnList 등)는 기본 type으로 변환
+    if isinstance(obj, Mapping):
+        return dict(obj)
+
+    if isinstance(obj, list):
+        return list(obj)
+
+    if isinstance(obj, tuple):
+        return msgpack.ExtType(EXT_TUPLE, pack(list(obj)))
+
+    # datetime, model instance 등은 pickle 사용
+    raise UnsupportedType
+
+
+def pack(obj):
+    return msgpack.packb(obj, default=msgpack_default, use_bin_type=True, strict_types=True)
+
+
+def unpack(data):
+    return msgpack.unpackb(data, ext_hook=msgpack_ext_hook, raw=False, strict_map_key=False)
+
+
+def msgpack_ext_hook(code, data):
+    if code == EXT_TUPLE:
+        return tuple(unpack(data))
+
+    return msgpack.ExtType(code, data)
+
+
+class CacheSerializer:
+    """
+    redis cache serializer (CACHES OPTIONS의 serializer로 사용)
+
+    - 기본은 pickle, codec="msgpack"인 경우 dict / list / str / bytes / 숫자로만 구성된 값은 msgpack(설치된 경우), 그 외에는 pickle
+      (benchmark_cache_serializer command 결과 UserSerializer page 기준 msgpack은 pickle보다 크고 느려 기본값으로 사용하지 않음)
+    - threshold byte 이상이면 zlib 압축 (level 1, 압축률보다 속도 우선), render 된 JSON 응답 기준 약 1/15 크기
+    - header에 version을 기록하며, 읽을 수 없는 version의 값은 UnsupportedVersion을 발생시키고
+      cache_backends.VersionedRedisCache가 cache miss로 처리하여 rolling deploy 중 서로 다른 version의 worker가 같은 cache를 사용해도 오류가 발생하지 않음
+    - incr / decr가 redis에서 atomic 하게 동작하도록 int는 그대로 저장 (django RedisSerializer와 동일)
+
+    Example:
+        CACHES = {
+            "default": {
+                "BACKEND": "base_project.cache_backends.VersionedRedisCache",
+                "LOCATION": "redis://localhost:6379",
+                "OPTIONS": {"serializer": "base_project.cache_serializer.CacheSerializer"},
+            }
+        }
+    """
+
+    def __init__(self, threshold=1024, level=1, protocol=pickle.HIGHEST_PROTOCOL, codec="pickle"):
+        self.threshold = threshold
+        self.level = level
+        self.protocol = protocol
+        self.use_msgpack = codec == "msgpack" and msgpack is not None
+
+    def encode(self, obj):
+        if self.use_msgpack:
+            try:
+                return CODEC_MSGPACK, pack(obj)
+            except (UnsupportedType, TypeError, ValueError, OverflowError):
+                pass
+
+        return CODEC_PICKLE, pickle.dumps(obj, self.protocol)
+
+    def dumps(self, obj):
+        if type(obj) is int:
+            return obj
+
+        codec, payload = self.encode(obj)
+        flags = codec
+
+        if len(payload) >= self.threshold:
+            payload = zlib.compress(payload, self.level)
+            flags |= FLAG_COMPRESSED
+
+        return bytes((MAGIC, VERSION, flags)) + payload
+
+    def loads(self, data):
+        try:
+            return int(data)
+        except ValueError:
+            pass
+
+        # 이전 version(django RedisSerializer)에서 저장된 pickle
+        if data[0] != MAGIC:
+            return pickle.loads(data)
+
+        if data[1] != VERSION:
+            raise UnsupportedVersion(data[1])
+
+        flags = data[2]
+        payload = data[HEADER_SIZE:]
+
+        if flags & FLAG_COMPRESSED:
+            payload = zlib.decompress(payload)
+
+        if flags & ~FLAG_COMPRESSED == CODEC_MSGPACK:
+            return unpack(payload)
+
+        return pickle.loads(payload)
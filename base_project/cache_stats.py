@@ -0,0 +1,124 @@
+import time
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+FIELDS = ("hits", "misses", "compute_us", "size_bytes", "size_count", "invalidations")
+NAMESPACES_KEY = "cache_stats:namespaces"
+STATS_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_stats_key(namespace, field):
+    return f"cache_stats:{namespace}:{field}"
+
+
+class CacheStats:
+    """
+    caching_view / caching_model_method의 namespace(view / alias / model method) 별 통계
+    process 안에서 누적한 뒤 CACHE_STATS_INTERVAL 마다 cache.incr로 합산하므로 요청마다 cache를 호출하지 않음
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        self._namespaces = set()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, namespace, flush=True, **values):
+        if not settings.CACHE_STATS:
+            return
+
+        with self._lock:
+            counts = self._counts[namespace]
+            for field, value in values.items():
+                counts[field] += value
+
+        if flush and self.is_flush_due():
+            self.flush()
+
+    def is_flush_due(self):
+        return time.monotonic() - self._last_flush >= settings.CACHE_STATS_INTERVAL
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+            self._last_flush = time.monotonic()
+
+        if not counts:
+            return
+
+        for namespace, values in counts.items():
+            for field, value in values.items():
+                if not value:
+                    continue
+
+                key = get_stats_key(namespace, field)
+                if not cache.add(key, int(value), timeout=STATS_TIMEOUT):
+                    try:
+                        cache.incr(key, int(value))
+                    except ValueError:
+                        cache.add(key, int(value), timeout=STATS_TIMEOUT)
+
+        # 다른 worker와 동시에 갱신하여 목록이 유실되더라도 다음 flush에서 다시 추가됨
+        self._namespaces.update(counts)
+        namespaces = cache.get(NAMESPACES_KEY, set())
+        if not self._namespaces <= namespaces:
+            cache.set(NAMESPACES_KEY, namespaces | self._namespaces, timeout=STATS_TIMEOUT)
+
+
+stats = CacheStats()
+
+
+def record_hit(namespace, size=None, flush=True):
+    if size is None:
+        stats.add(namespace, flush, hits=1)
+    else:
+        stats.add(namespace, flush, hits=1, size_bytes=size, size_count=1)
+
+
+def record_miss(namespace, compute_time, flush=True):
+    stats.add(namespace, flush, misses=1, compute_us=compute_time * 1000000)
+
+
+def record_size(namespace, size, flush=True):
+    stats.add(namespace, flush, size_bytes=size, size_count=1)
+
+
+def record_invalidation(namespace):
+    stats.add(namespace, invalidations=1)
+
+
+async def aflush():
+    """ async view에서는 record_*(flush=False) 후 호출, cache 호출이 event loop를 막지 않도록 thread에서 flush """
+    if settings.CACHE_STATS and stats.is_flush_due():
+        await sync_to_async(stats.flush)()
+
+
+def get_stats():
+    """ 전체 worker의 통계, 현재 process의 통계도 먼저 반영 """
+    stats.flush()
+
+    namespaces = sorted(cache.get(NAMESPACES_KEY, set()))
+    keys = [get_stats_key(namespace, field) for namespace in namespaces for field in FIELDS]
+    values = cache.get_many(keys)
+
+    result = []
+    for namespace in namespaces:
+        row = {field: values.get(get_stats_key(namespace, field), 0) for field in FIELDS}
+        requests = row["hits"] + row["misses"]
+        compute_time = row["compute_us"] / row["misses"] / 1000000 if row["misses"] else 0
+
+        result.append({
+            "namespace": namespace,
+            **row,
+            "hit_ratio": row["hits"] / requests if requests else 0,
+            "average_size": row["size_bytes"] / row["size_count"] if row["size_count"] else 0,
+            "average_compute_time": compute_time,
+            # cache hit 시 계산하지 않아 절약된 시간 추정치
+            "saved_time": row["hits"] * compute_time,
+        })
+
+    return result
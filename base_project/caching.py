@@ -0,0 +1,444 @@
+import math
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from functools import partial
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.utils.http import parse_etags, urlencode
+
+from base_project import metrics
+from base_project import cache_stats
+
+
+# 이전 배포(KEY_PREFIX)의 generation key도 만료되도록 timeout 지정, 만료 후 다시 생성되어도 시간값이므로 이전 key와 겹치지 않음
+GENERATION_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_generation_key(namespace):
+    return f"generation:{namespace}"
+
+
+def get_initial_generation():
+    # generation key가 eviction 등으로 사라졌다가 다시 생성되어도 이전 generation과 겹치지 않도록 시간값 사용
+    return time.time_ns() // 1000
+
+
+def get_generation(namespace):
+    """
+    namespace(view / alias / model method)의 현재 generation 반환
+    cache key에 generation을 포함하므로 generation이 바뀌면 이전 key는 더 이상 조회되지 않고 timeout으로 만료됨
+    """
+    key = get_generation_key(namespace)
+
+    if (generation := cache.get(key)) is not None:
+        return generation
+
+    cache.add(key, get_initial_generation(), timeout=GENERATION_TIMEOUT)
+    return cache.get(key)
+
+
+def bump_generation(namespace):
+    """
+    namespace의 generation을 증가시켜 캐싱 데이터 전체를 무효화
+    incr는 cache server에서 atomic 하게 처리되므로 여러 worker가 동시에 호출해도 갱신이 유실되지 않음
+    """
+    key = get_generation_key(namespace)
+    cache_stats.record_invalidation(namespace)
+
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, get_initial_generation(), timeout=GENERATION_TIMEOUT):
+            return cache.get(key)
+
+        return cache.incr(key)
+
+
+def get_generations(namespaces):
+    """ 여러 namespace의 generation을 한 번의 get_many로 조회 """
+    keys = [get_generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+
+    for key in keys:
+        if key not in generations:
+            cache.add(key, get_initial_generation(), timeout=GENERATION_TIMEOUT)
+            generations[key] = cache.get(key)
+
+    return [generations[key] for key in keys]
+
+
+async def aget_generations(namespaces):
+    """ get_generations의 async 버전 """
+    keys = [get_generation_key(namespace) for namespace in namespaces]
+    generations = await cache.aget_many(keys)
+
+    for key in keys:
+        if key not in generations:
+            await cache.aadd(key, get_initial_generation(), timeout=GENERATION_TIMEOUT)
+            generations[key] = await cache.aget(key)
+
+    return [generations[key] for key in keys]
+
+
+def get_model_namespace(model):
+    """ model class 또는 "app_label.Model" 문자열 """
+    label = model if isinstance(model, str) else model._meta.label
+    return f"model:{label.lower()}"
+
+
+def get_version(namespace, models=None):
+    """
+    cache key에 포함할 namespace와 의존 model들의 generation
+    namespace가 무효화되거나 의존 model 데이터가 변경되면 값이 바뀜
+    """
+    namespaces = [namespace, *sorted({get_model_namespace(model) for model in models or []})]
+    return ".".join(str(generation) for generation in get_generations(namespaces))
+
+
+async def aget_version(namespace, models=None):
+    """ get_version의 async 버전 """
+    namespaces = [namespace, *sorted({get_model_namespace(model) for model in models or []})]
+    return ".".join(str(generation) for generation in await aget_generations(namespaces))
+
+
+def bump_model_generation(namespace):
+    # 한 번도 조회되지 않은 generation은 의존하는 캐싱 데이터가 없으므로 생성하지 않음
+    try:
+        cache.incr(get_generation_key(namespace))
+    except ValueError:
+        return
+
+    cache_stats.record_invalidation(namespace)
+
+
+def invalidate_model(*models, using=None):
+    """
+    model에 의존하는 캐싱 데이터를 transaction commit 이후 무효화
+    signal이 발생하지 않는 QuerySet.update(), bulk_create() 등을 사용한 뒤 직접 호출
+
+    Example:
+        User.objects.filter(is_active=False).update(is_active=True)
+        invalidate_model(User)
+    """
+    for model in models:
+        transaction.on_commit(partial(bump_model_generation, get_model_namespace(model)), using=using)
+
+
+def invalidate_on_save(sender, using=None, **kwargs):
+    invalidate_model(sender, using=using)
+
+
+def invalidate_on_m2m_changed(sender, instance, model, action, using=None, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_model(sender, instance.__class__, model, using=using)
+
+
+def connect_signals():
+    """
+    post_save / post_delete / m2m_changed 발생 시 해당 model의 generation 증가
+    django 기본 app(session, admin log 등)은 view 캐싱 대상이 아니므로 제외
+    """
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.app_config.name.startswith("django."):
+            continue
+
+        post_save.connect(invalidate_on_save, sender=model, dispatch_uid=f"caching_post_save_{model._meta.label}")
+        post_delete.connect(invalidate_on_save, sender=model, dispatch_uid=f"caching_post_delete_{model._meta.label}")
+        # m2m_changed의 sender는 through model
+        m2m_changed.connect(invalidate_on_m2m_changed, sender=model, dispatch_uid=f"caching_m2m_{model._meta.label}")
+
+
+class InvalidatingQuerySet(QuerySet):
+    """
+    update(), bulk_create(), bulk_update() 후 model의 캐싱 데이터를 무효화하는 QuerySet
+
+    Example:
+        class Post(models.Model):
+            objects = InvalidatingQuerySet.as_manager()
+    """
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        invalidate_model(self.model, using=self.db)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        invalidate_model(self.model, using=self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        invalidate_model(self.model, using=self.db)
+        return rows
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_lock_key(key):
+    return f"lock:{key}"
+
+
+def acquire_flight(key, lock_timeout):
+    """
+    key를 다시 계산할 권한 획득
+    같은 process 안에서는 threading.Event로, process 간에는 cache.add lock으로 한 곳에서만 계산
+    LocMemCache는 process 별 cache이므로 cache.add lock이 process 안의 lock 역할만 함
+    """
+    with _flights_lock:
+        if key in _flights:
+            return None
+
+        event = _flights[key] = threading.Event()
+
+    if cache.add(get_lock_key(key), 1, timeout=lock_timeout):
+        return event
+
+    release_flight(key, event, locked=False)
+    return None
+
+
+def release_flight(key, event, locked=True):
+    if locked:
+        cache.delete(get_lock_key(key))
+
+    with _flights_lock:
+        _flights.pop(key, None)
+
+    event.set()
+
+
+def wait_flight(key, lock_timeout):
+    """ 다른 thread / process가 계산을 마칠 때까지 대기, 시간 안에 갱신되지 않으면 None """
+    deadline = time.monotonic() + lock_timeout
+
+    if event := _flights.get(key):
+        event.wait(lock_timeout)
+
+    interval = 0.01
+    while True:
+        entry = cache.get(key)
+        if entry is not None and (entry[1] is None or entry[1] > time.time()):
+            return entry
+
+        # 계산하던 곳이 실패하여 lock이 해제된 경우에도 직접 계산
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not cache.has_key(get_lock_key(key)):
+            return None
+
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, 0.2)
+
+
+# event loop 별 flight, asyncio.Event는 생성된 loop에서만 기다릴 수 있음
+_async_flights = {}
+
+
+async def aacquire_flight(key, lock_timeout):
+    """ acquire_flight의 async 버전, 같은 event loop 안에서는 asyncio.Event로 한 곳에서만 계산 """
+    flight_key = (asyncio.get_running_loop(), key)
+    if flight_key in _async_flights:
+        return None
+
+    event = _async_flights[flight_key] = asyncio.Event()
+
+    if await cache.aadd(get_lock_key(key), 1, timeout=lock_timeout):
+        return event
+
+    await arelease_flight(key, event, locked=False)
+    return None
+
+
+async def arelease_flight(key, event, locked=True):
+    if locked:
+        await cache.adelete(get_lock_key(key))
+
+    _async_flights.pop((asyncio.get_running_loop(), key), None)
+    event.set()
+
+
+async def await_flight(key, lock_timeout):
+    """ wait_flight의 async 버전, 기다리는 동안 event loop를 막지 않음 """
+    deadline = time.monotonic() + lock_timeout
+
+    if event := _async_flights.get((asyncio.get_running_loop(), key)):
+        try:
+            await asyncio.wait_for(event.wait(), lock_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    interval = 0.01
+    while True:
+        entry = await cache.aget(key)
+        if entry is not None and (entry[1] is None or entry[1] > time.time()):
+            return entry
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not await cache.ahas_key(get_lock_key(key)):
+            return None
+
+        await asyncio.sleep(min(interval, remaining))
+        interval = min(interval * 2, 0.2)
+
+
+def get_entry_timeout(timeout=DEFAULT_TIMEOUT, stale_timeout=0):
+    """ (만료까지 남은 시간, cache에 보관할 시간) """
+    ttl = cache.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+    return ttl, None if ttl is None else ttl + stale_timeout
+
+
+def get_or_compute(
+    key, compute, to_cache, timeout=DEFAULT_TIMEOUT, stale_timeout=0, lock_timeout=10, early_refresh=1.0
+):
+    """
+    cache stampede를 막으면서 key의 값을 조회하거나 계산
+
+    - single-flight : 만료된 key는 lock을 획득한 한 곳에서만 계산하고 나머지는 결과를 기다림
+    - early refresh : 계산 시간과 early_refresh에 비례한 확률로 만료 전에 미리 갱신 (XFetch, 0이면 사용 안 함)
+    - stale-while-revalidate : 만료 후 stale_timeout 동안은 다른 곳에서 갱신하는 동안 이전 값을 응답
+
+    cache에는 (data, 만료 시각, 계산 시간)을 저장하며 (cache hit 여부, data 또는 compute 반환값) 반환
+    to_cache가 None을 반환하면 캐싱하지 않음
+    """
+    ttl, entry_timeout = get_entry_timeout(timeout, stale_timeout)
+    entry = cache.get(key)
+    now = time.time()
+
+    if entry is not None:
+        data, expires, delta = entry
+        if expires is None or now - delta * early_refresh * math.log(1 - random.random()) < expires:
+            return True, data
+
+        if now < expires:
+            metrics.CACHE_STAMPEDE_COUNT.inc("early_refresh")
+
+    if (event := acquire_flight(key, lock_timeout)) is None:
+        if entry is not None:
+            if now >= entry[1]:
+                metrics.CACHE_STAMPEDE_COUNT.inc("stale")
+            return True, entry[0]
+
+        if (entry := wait_flight(key, lock_timeout)) is not None:
+            metrics.CACHE_STAMPEDE_COUNT.inc("coalesced")
+            return True, entry[0]
+
+        metrics.CACHE_STAMPEDE_COUNT.inc("lock_timeout")
+        return False, compute()
+
+    try:
+        start = time.monotonic()
+        result = compute()
+        delta = time.monotonic() - start
+
+        if (data := to_cache(result)) is not None:
+            expires = None if ttl is None else time.time() + ttl
+            cache.set(key, (data, expires, delta), timeout=entry_timeout)
+    finally:
+        release_flight(key, event)
+
+    return False, result
+
+
+async def aget_or_compute(
+    key, compute, to_cache, timeout=DEFAULT_TIMEOUT, stale_timeout=0, lock_timeout=10, early_refresh=1.0
+):
+    """
+    get_or_compute의 async 버전, compute와 to_cache는 coroutine function
+    cache에 저장하는 값의 형태가 같으므로 sync / async view가 같은 key를 공유할 수 있음
+    """
+    ttl, entry_timeout = get_entry_timeout(timeout, stale_timeout)
+    entry = await cache.aget(key)
+    now = time.time()
+
+    if entry is not None:
+        data, expires, delta = entry
+        if expires is None or now - delta * early_refresh * math.log(1 - random.random()) < expires:
+            return True, data
+
+        if now < expires:
+            metrics.CACHE_STAMPEDE_COUNT.inc("early_refresh")
+
+    if (event := await aacquire_flight(key, lock_timeout)) is None:
+        if entry is not None:
+            if now >= entry[1]:
+                metrics.CACHE_STAMPEDE_COUNT.inc("stale")
+            return True, entry[0]
+
+        if (entry := await await_flight(key, lock_timeout)) is not None:
+            metrics.CACHE_STAMPEDE_COUNT.inc("coalesced")
+            return True, entry[0]
+
+        metrics.CACHE_STAMPEDE_COUNT.inc("lock_timeout")
+        return False, await compute()
+
+    try:
+        start = time.monotonic()
+        result = await compute()
+        delta = time.monotonic() - start
+
+        if (data := await to_cache(result)) is not None:
+            expires = None if ttl is None else time.time() + ttl
+            await cache.aset(key, (data, expires, delta), timeout=entry_timeout)
+    finally:
+        await arelease_flight(key, event)
+
+    return False, result
+
+
+def make_etag(content):
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def get_etag_key(key):
+    return f"{key}:etag"
+
+
+def is_not_modified(request, etag):
+    """ If-None-Match header가 etag와 일치하는지 확인 (weak 비교) """
+    if not etag or not (header := request.headers.get("If-None-Match")):
+        return False
+
+    etags = parse_etags(header)
+    return "*" in etags or etag in (x.removeprefix("W/") for x in etags)
+
+
+def get_params_key(query_dict, params=None):
+    """
+    request.GET의 canonical 표현
+    parameter 이름순으로 정렬하고 같은 이름의 값은 모두 포함(값의 순서는 유지), params가 주어지면 해당 parameter만 사용
+    """
+    items = [
+        (name, value)
+        for name in sorted(query_dict)
+        if params is None or name in params
+        for value in query_dict.getlist(name)
+    ]
+    return urlencode(items)
+
+
+def get_user_key(user, by_user=True):
+    """
+    by_user가 "class"인 경우 사용자 유형(anonymous / user / staff)만 구분하여 같은 유형의 사용자끼리 캐싱 데이터를 공유
+    """
+    if not user or not user.is_authenticated:
+        return "anonymous"
+
+    if by_user == "class":
+        return "staff" if user.is_staff else "user"
+
+    return str(user.pk)
+
+
+def hash_key(value):
+    """ 길이와 상관없이 고정 길이의 cache key """
+    return hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
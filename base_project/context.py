@@ -0,0 +1,74 @@
+import uuid
+from contextvars import ContextVar
+
+from django.utils.functional import SimpleLazyObject, empty
+
+request_context = ContextVar("request_context", default=None)
+
+
+def get_loaded_user(request):
+    """
+    이미 인증이 끝나 메모리에 올라와 있는 user만 반환
+    AuthenticationMiddleware의 lazy user가 아직 평가되지 않았다면 DB 조회 없이 None 반환
+    """
+    user = request.__dict__.get("user")
+
+    if isinstance(user, SimpleLazyObject):
+        return None if user._wrapped is empty else user._wrapped
+
+    return user
+
+
+class RequestContext:
+    """
+    logging에 사용되는 request 단위 정보
+    threading.local과 달리 asyncio 환경에서 하나의 thread를 공유하는 request끼리 섞이지 않음
+    user 식별자는 인증이 끝난 뒤 한 번만 계산해 저장하며, formatter에서 ORM을 호출하지 않도록 함
+    DRF 인증 전에 기록된 log의 anonymous는 저장하지 않아 이후 인증된 user로 다시 계산됨
+    """
+    __slots__ = ("request", "request_id", "path", "_user_id", "_userinfo", "_user_class")
+
+    def __init__(self, request):
+        self.request = request
+        self.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        self.path = request.path
+        self._user_id = None
+        self._userinfo = None
+        self._user_class = None
+
+    def resolve_user(self):
+        """ 인증된 user의 정보만 저장, 인증 전이거나 anonymous인 경우 다음 호출에서 다시 확인 """
+        if self._userinfo is not None:
+            return
+
+        if (user := get_loaded_user(self.request)) is not None and user.is_authenticated:
+            self._user_id = user.pk
+            self._userinfo = user.get_username()
+            self._user_class = "staff" if user.is_staff else "user"
+
+    def is_anonymous(self):
+        """ 인증이 끝났고 인증되지 않은 user인지 여부 """
+        user = get_loaded_user(self.request)
+        return user is not None and not user.is_authenticated
+
+    @property
+    def user_id(self):
+        self.resolve_user()
+        return self._user_id
+
+    @property
+    def userinfo(self):
+        self.resolve_user()
+        if self._userinfo is not None:
+            return self._userinfo
+
+        return "anonymous" if self.is_anonymous() else "-"
+
+    @property
+    def user_class(self):
+        """ anonymous / user / staff, request log 분석 시 사용자 유형별 집계에 사용 """
+        self.resolve_user()
+        if self._user_class is not None:
+            return self._user_class
+
+        return "anonymous" if self.is_anonymous() else "-"
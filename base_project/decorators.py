@@ -1,78 +1,197 @@
+import time
 from functools import wraps
-import json
+
+from asgiref.sync import iscoroutinefunction
 
 from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+from base_project import cache_stats
+from base_project.caching import (
+    get_version, aget_version, get_or_compute, aget_or_compute, get_entry_timeout, get_etag_key, make_etag,
+    is_not_modified, get_params_key, get_user_key, hash_key,
+)
 
-from rest_framework.response import Response
 
-from base_project.utils import get_cached_list
+PREFETCHED_ATTR = "_prefetched_cached_methods"
 
 
-def caching_model_method(by_instance=True, by_user=True, using_cache_list=False):
+def caching_model_method(by_instance=True, by_user=True, using_cache_list=False, depends_on=None):
+    """
+    model method의 반환값을 캐싱하는 데코레이터
+    여러 instance의 값은 method.prefetch(instances, request)로 한 번에 조회 / 저장할 수 있음 (prefetch_cached_methods 참고)
+    prefetch 된 값은 instance에 저장되므로, instance가 살아 있는 동안 generation이 바뀌어도(무효화) 갱신되지 않음
+
+    Args:
+        using_cache_list (bool, optional): True인 경우 utils.clear_cached_model_method로 캐싱 데이터를 삭제할 수 있음. Defaults to False.
+        depends_on (list, optional): 반환값이 의존하는 model(class 또는 "app_label.Model") 목록, 해당 model이 변경되면 캐싱 데이터가 무효화됨.
+            using_cache_list=True이고 지정하지 않은 경우 method가 정의된 model. Defaults to None.
+    """
     def decorator(view_func):
-        @wraps(view_func)
-        def _wrapped_view(instance, request=None):
-            model = instance.__class__.__name__
-            method = view_func.__name__
+        method = view_func.__name__
+
+        def get_key_prefix(model_class):
+            cache_key = f"{model_class.__name__}:{method}"
+            if using_cache_list or depends_on:
+                cache_key += f":{get_version(cache_key, depends_on or [model_class])}"
+
+            return cache_key
 
-            cache_key = f"{model}:{method}"
+        def get_user(request):
+            if not (by_user and request):
+                return ""
+
+            if not request.user or not request.user.is_authenticated:
+                return "anonymous"
+
+            return request.user.pk
+
+        def get_cache_key(prefix, instance, user):
+            cache_key = prefix
             if by_instance:
                 cache_key += f":{instance.pk}"
 
-            if by_user and request:
-                if not request.user or not request.user.is_authenticated:
-                    user = "anonymous"
-                else:
-                    user = request.user.pk
-
+            if user != "":
                 cache_key += f":{user}"
 
+            return cache_key
+
+        @wraps(view_func)
+        def _wrapped_view(instance, request=None):
+            user = get_user(request)
+
+            # prefetch로 미리 조회된 값
+            prefetched = instance.__dict__.get(PREFETCHED_ATTR)
+            if prefetched and (method, user) in prefetched:
+                return prefetched[(method, user)]
+
+            cache_key = get_cache_key(get_key_prefix(instance.__class__), instance, user)
+            namespace = f"{instance.__class__.__name__}:{method}"
+
             cached_data = cache.get(cache_key)
 
             if cached_data != None:
+                cache_stats.record_hit(namespace)
                 return cached_data
 
+            start = time.perf_counter()
             result = view_func(instance, request)
+            cache_stats.record_miss(namespace, time.perf_counter() - start)
 
             cache.set(cache_key, result)
 
-            if using_cache_list:
-                cache_list_key = f"{model}:{method}:list"
-                cache_list = cache.get(cache_list_key, [])
-                cache_list.append(cache_key)
-                cache.set(cache_list_key, cache_list)
-
             return result
 
+        def prefetch(instances, request=None):
+            """ instance 목록의 캐싱 데이터를 get_many 한 번으로 조회하고, 없는 값은 계산하여 set_many로 저장 """
+            if not instances:
+                return
+
+            user = get_user(request)
+            prefix = get_key_prefix(instances[0].__class__)
+            keys = [get_cache_key(prefix, instance, user) for instance in instances]
+
+            cached = cache.get_many(set(keys))
+            missing = {}
+
+            start = time.perf_counter()
+            for instance, cache_key in zip(instances, keys):
+                if (value := cached.get(cache_key, missing.get(cache_key))) is None:
+                    value = missing[cache_key] = view_func(instance, request)
+
+                instance.__dict__.setdefault(PREFETCHED_ATTR, {})[(method, user)] = value
+
+            if missing:
+                cache.set_many(missing)
+
+            cache_stats.stats.add(
+                f"{instances[0].__class__.__name__}:{method}",
+                hits=len(instances) - len(missing),
+                misses=len(missing),
+                compute_us=(time.perf_counter() - start) * 1000000 if missing else 0,
+            )
+
+        _wrapped_view.prefetch = prefetch
         return _wrapped_view
     return decorator
 
 
-def caching_view(caching_request_data=True, by_user=True, alias=None):
+def prefetch_cached_methods(instances, methods, request=None):
+    """
+    caching_model_method가 적용된 method들의 캐싱 데이터를 instance 목록에 대해 한 번에 조회
+    조회된 값은 instance.__dict__에 저장되어 이후 무효화와 상관없이 사용되므로, request 안에서만 사용할 instance에 호출
+
+    Example:
+        users = list(User.objects.all())
+        prefetch_cached_methods(users, ["get_point"], request)
+        [user.get_point(request) for user in users]  # cache 조회 없이 반환
+    """
+    if not instances:
+        return
+
+    model_class = instances[0].__class__
+    for name in methods:
+        getattr(model_class, name).prefetch(instances, request)
+
+
+def caching_view(
+    caching_request_data=True, by_user=True, alias=None, depends_on=None, params=None,
+    timeout=DEFAULT_TIMEOUT, stale_timeout=0, lock_timeout=10, early_refresh=1.0, max_age=None, private=None,
+):
     """
     view에 들어오는 동일한 요청에 대해 응답을 캐싱하는 데코레이터
+    render 된 응답(bytes)과 ETag를 함께 캐싱하며, If-None-Match가 일치하면 304 응답
+    async view(coroutine function)에는 cache.aget / aset을 사용하며, function view(request, ...)에도 사용할 수 있음
 
     Args:
         caching_request_data (bool, optional): request.GET의 parameter를 캐싱 키에 포함할지 여부. Defaults to True.
+        by_user (bool | str, optional): 사용자별로 캐싱할지 여부, "class"인 경우 사용자 유형(anonymous / user / staff)별로 캐싱.
+            응답이 사용자 본인의 데이터가 아닌 권한에 따라서만 달라지는 경우 "class"를 사용. Defaults to True.
         alias (str, optional): 캐싱 키를 직접 지정할 경우 사용. Defaults to None.
+        depends_on (list, optional): 응답이 의존하는 model(class 또는 "app_label.Model") 목록, 해당 model이 변경되면 캐싱 데이터가 무효화됨.
+            지정하지 않은 경우 viewset의 queryset model. Defaults to None.
+        params (list, optional): 응답에 영향을 주는 parameter 목록, 지정하면 나머지 parameter는 캐싱 키에서 제외. Defaults to None.
+        timeout (int, optional): 캐싱 유지 시간(초), 지정하지 않은 경우 CACHES의 TIMEOUT.
+        stale_timeout (int, optional): 만료 후 다른 요청이 갱신하는 동안 이전 응답을 사용할 수 있는 시간(초). Defaults to 0.
+        lock_timeout (int, optional): 다른 요청이 갱신할 때 기다리는 최대 시간(초). Defaults to 10.
+        early_refresh (float, optional): 만료 전 미리 갱신할 확률의 가중치, 0인 경우 사용 안 함. Defaults to 1.0.
+        max_age (int, optional): 응답의 Cache-Control max-age, 지정하지 않은 경우 매 요청마다 ETag로 확인(no-cache). Defaults to None.
+        private (bool, optional): Cache-Control private 여부, 지정하지 않은 경우 by_user와 같음. Defaults to None.
 
     Example:
         class UserViewSet(viewsets.ModelViewSet):
             ...
-            @caching_view(alias="${some alias}", caching_request_data=False)
+            @caching_view(alias="${some alias}", by_user="class", params=["page", "search"], depends_on=[User, "post.Comment"])
             @action(detail=False, methods=["GET"])
             def some_function(self, request):
                 ...
+
+        @caching_view(by_user=False, max_age=60)
+        async def some_async_view(request, filename):
+            ...
     """
-    def decorator(view_func):
-        @wraps(view_func)
-        def _wrapped_view(instance, request, *args, **kwargs):
-            if request.method != "GET":
-                return view_func(instance, request, *args, **kwargs)
+    cache_control = {"private" if (by_user if private is None else private) else "public": True}
+    if max_age is None:
+        cache_control["no_cache"] = True
+    else:
+        cache_control["max_age"] = max_age
 
+    def add_headers(response, etag):
+        response["ETag"] = etag
+        patch_cache_control(response, **cache_control)
+        return response
+
+    def decorator(view_func):
+        def get_namespace(instance):
+            """ (view_info, 의존 model 목록) """
             if alias:
                 view_info = alias
 
+            elif instance is None:
+                view_info = f"{view_func.__module__}:{view_func.__name__}"
+
             else:
                 class_ = instance.__class__
                 module_path = class_.__module__
@@ -80,33 +199,156 @@ def caching_view(caching_request_data=True, by_user=True, alias=None):
                 function_name = view_func.__name__
                 view_info = f"{module_path}:{class_name}:{function_name}"
 
+            models = depends_on
+            if models is None and (queryset := getattr(instance, "queryset", None)) is not None:
+                models = [queryset.model]
+
+            return view_info, models
+
+        def get_cache_key(view_info, version, request, user, by_path=False):
+            # utils.clear_cached_view 호출 또는 의존 model 변경 시 generation(version)이 바뀌어 이전 캐싱 데이터는 조회되지 않음
+            renderer = getattr(request, "accepted_renderer", None)
+            variant = renderer.format if renderer else ""
+            # function view는 url의 parameter(request, filename 등)에 따라 응답이 달라지므로 path 포함
+            if by_path:
+                variant += request.path
             if caching_request_data:
-                params_string = str(request.GET.dict()).replace(" ", "")
-                cache_key = f"{view_info}:{params_string}"
+                variant += f"?{get_params_key(request.GET, params)}"
+
+            if by_user:
+                variant += f"@{get_user_key(user, by_user)}"
+
+            # parameter 길이와 상관없이 key 길이가 일정하도록 hash 사용
+            return f"{view_info}:{version}:{hash_key(variant)}"
+
+        def is_cacheable(request):
+            # browsable api는 요청마다 내용(csrf token, 사용자 정보 등)이 달라지므로 캐싱하지 않음
+            renderer = getattr(request, "accepted_renderer", None)
+            return request.method == "GET" and not (renderer and renderer.format == "api")
+
+        def render(instance, request, response, *args, **kwargs):
+            """ 캐싱할 (content, content type, etag), 캐싱할 수 없는 응답이면 None """
+            if response.status_code != 200 or response.streaming:
+                return None
+
+            if instance is not None:
+                response = instance.finalize_response(request, response, *args, **kwargs)
+
+            if hasattr(response, "render"):
+                response.render()
+
+            response["ETag"] = etag = make_etag(response.content)
+            return response.content, response["Content-Type"], etag
+
+        def make_response(view_info, request, hit, result, flush_stats=True):
+            if not hit:
+                return add_headers(result, result["ETag"]) if result.has_header("ETag") else result
+
+            content, content_type, etag = result
+            cache_stats.record_hit(view_info, len(content), flush=flush_stats)
+            if is_not_modified(request, etag):
+                return add_headers(HttpResponseNotModified(), etag)
+
+            # renderer를 거치지 않고 캐싱된 bytes를 그대로 응답
+            return add_headers(HttpResponse(content, content_type=content_type), etag)
 
+        @wraps(view_func)
+        def _wrapped_view(instance, request, *args, **kwargs):
+            if not is_cacheable(request):
+                return view_func(instance, request, *args, **kwargs)
+
+            view_info, models = get_namespace(instance)
+            cache_key = get_cache_key(view_info, get_version(view_info, models), request, request.user)
+
+            # 캐싱된 응답을 읽기 전에 ETag만 조회하여 304 응답
+            etag_key = get_etag_key(cache_key)
+            if is_not_modified(request, etag := cache.get(etag_key)):
+                cache_stats.record_hit(view_info)
+                return add_headers(HttpResponseNotModified(), etag)
+
+            def compute():
+                start = time.perf_counter()
+                response = view_func(instance, request, *args, **kwargs)
+                cache_stats.record_miss(view_info, time.perf_counter() - start)
+                return response
+
+            def to_cache(response):
+                if (data := render(instance, request, response, *args, **kwargs)) is None:
+                    return None
+
+                cache_stats.record_size(view_info, len(data[0]))
+                cache.set(etag_key, data[2], timeout=get_entry_timeout(timeout, stale_timeout)[1])
+                return data
+
+            hit, result = get_or_compute(
+                cache_key,
+                compute,
+                to_cache,
+                timeout=timeout,
+                stale_timeout=stale_timeout,
+                lock_timeout=lock_timeout,
+                early_refresh=early_refresh,
+            )
+
+            return make_response(view_info, request, hit, result)
+
+        @wraps(view_func)
+        async def _async_wrapped_view(*args, **kwargs):
+            # viewset method(instance, request, ...)와 function view(request, ...) 모두 사용 가능
+            if isinstance(args[0], HttpRequest):
+                instance, request, view_args = None, args[0], args[1:]
             else:
-                cache_key = view_info
+                instance, request, view_args = args[0], args[1], args[2:]
+
+            if not is_cacheable(request):
+                return await view_func(*args, **kwargs)
 
+            # django HttpRequest.user는 async context에서 조회할 수 없으므로 auser 사용
+            user = None
             if by_user:
-                if not request.user or not request.user.is_authenticated:
-                    user = "anonymous"
-                else:
-                    user = request.user.pk
+                user = await request.auser() if isinstance(request, HttpRequest) else request.user
 
-                cache_key += f":{user}"
+            view_info, models = get_namespace(instance)
+            version = await aget_version(view_info, models)
+            cache_key = get_cache_key(view_info, version, request, user, by_path=instance is None)
 
-            cached_data = cache.get(cache_key)
+            # 통계의 flush(cache 호출)는 event loop를 막지 않도록 응답 전에 cache_stats.aflush에서 처리
+            etag_key = get_etag_key(cache_key)
+            if is_not_modified(request, etag := await cache.aget(etag_key)):
+                cache_stats.record_hit(view_info, flush=False)
+                await cache_stats.aflush()
+                return add_headers(HttpResponseNotModified(), etag)
 
-            if cached_data != None:
-                return Response(cached_data)
+            async def compute():
+                start = time.perf_counter()
+                response = await view_func(*args, **kwargs)
+                cache_stats.record_miss(view_info, time.perf_counter() - start, flush=False)
+                return response
+
+            async def to_cache(response):
+                if (data := render(instance, request, response, *view_args, **kwargs)) is None:
+                    return None
 
-            response = view_func(instance, request, *args, **kwargs)
-            cache.set(cache_key, response.data)
-            cached_list_key, cached_list = get_cached_list(view_info)
-            cached_list.append(cache_key)
-            cache.set(cached_list_key, json.dumps(cached_list))
+                cache_stats.record_size(view_info, len(data[0]), flush=False)
+                await cache.aset(etag_key, data[2], timeout=get_entry_timeout(timeout, stale_timeout)[1])
+                return data
 
+            hit, result = await aget_or_compute(
+                cache_key,
+                compute,
+                to_cache,
+                timeout=timeout,
+                stale_timeout=stale_timeout,
+                lock_timeout=lock_timeout,
+                early_refresh=early_refresh,
+            )
+
+            response = make_response(view_info, request, hit, result, flush_stats=False)
+            await cache_stats.aflush()
             return response
 
+        if iscoroutinefunction(view_func):
+            return _async_wrapped_view
+
         return _wrapped_view
     return decorator
@@ -1,7 +1,15 @@
 import os
+import sys
+import gzip
+import json
+import pickle
+import shutil
+import struct
 import asgiref
 import logging
 import logging.handlers
+import threading
+from datetime import datetime
 
 from rich import get_console
 from rich.pretty import pretty_repr, pprint
@@ -16,6 +24,13 @@ from django.core.management.color import color_style
 
 import rest_framework
 
+from base_project.context import request_context
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 DEFAULT_SETTING = {
     "level": logging.NOTSET,
     "show_time": False,
@@ -53,16 +68,33 @@ class NoOutputLogHandler(RichHandler):
         super().__init__(*args, **kwargs)
 
 
+def compress_logfile(path):
+    """ rotate 된 로그 파일을 gzip으로 압축한 뒤 원본 삭제 """
+    try:
+        with open(path, "rb") as src, gzip.open(f"{path}.gz.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+        os.replace(f"{path}.gz.tmp", f"{path}.gz")
+        os.remove(path)
+
+    except OSError:
+        pass
+
+
 class TimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
-    """ 로그 파일을 날짜별로 생성하는 핸들러 """
+    """
+    로그 파일을 날짜별로 생성하는 핸들러, filename을 지정하지 않으면 settings.LOGFILE에 기록
+    rotate 된 파일은 background thread에서 gzip으로 압축하며, backupCount를 넘는 파일은 삭제
+    """
 
     def __init__(self, *args, **kwargs):
-        path, _ = os.path.split(settings.LOGFILE)
+        filename = kwargs.get("filename", settings.LOGFILE)
+        path, _ = os.path.split(filename)
         if path:
             os.path.isdir(path) or os.makedirs(path)
 
         kwargs.update({
-            "filename": settings.LOGFILE,
+            "filename": filename,
             "when": "midnight",
             "interval": 1,
             "backupCount": 10,
@@ -70,6 +102,57 @@ class TimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
 
         super().__init__(*args, **kwargs)
 
+    def rotate(self, source, dest):
+        super().rotate(source, dest)
+
+        if os.path.exists(dest):
+            threading.Thread(target=compress_logfile, args=(dest, ), daemon=True).start()
+
+
+# LogRecord 기본 속성, 그 외의 속성(extra)은 pickle 할 수 없는 경우 repr로 전송
+LOG_RECORD_FIELDS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+# django.request / django.server record의 request(socket 포함) 등은 writer process에서 사용하지 않으므로 제외
+DROPPED_RECORD_FIELDS = ("request", "server_time")
+
+
+class LogSocketHandler(logging.handlers.SocketHandler):
+    """
+    log record를 unix socket을 통해 log writer process(base_project.logserver)로 전송하는 핸들러
+    writer process에는 request context가 없으므로 전송 전에 record에 user, request 정보를 기록
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(settings.LOG_SOCKET, None)
+
+    def makePickle(self, record):
+        set_request_context(record)
+
+        if record.exc_info:
+            self.format(record)
+
+        data = dict(record.__dict__)
+        # json formatter에서 사용할 수 있도록 dict 형태의 message는 그대로 전송
+        data["msg"] = record.msg if isinstance(record.msg, dict) and not record.args else record.getMessage()
+        data["args"] = None
+        data["exc_info"] = None
+        data.pop("message", None)
+
+        for key in DROPPED_RECORD_FIELDS:
+            data.pop(key, None)
+
+        for key, value in data.items():
+            if key in LOG_RECORD_FIELDS and key != "msg":
+                continue
+
+            try:
+                pickle.dumps(value, 1)
+            except Exception:
+                data[key] = record.getMessage() if key == "msg" else repr(value)
+
+        pickled = pickle.dumps(data, 1)
+
+        return struct.pack(">L", len(pickled)) + pickled
+
 
 class LogFileHandler(RichHandler):
     """ 파일에 로그를 출력하는 핸들러 """
@@ -84,6 +167,18 @@ class LogFileHandler(RichHandler):
         super().__init__(*args, **kwargs)
 
 
+class JSONLogHandler(logging.StreamHandler):
+    """ rich를 거치지 않고 stdout에 한 줄 단위 json 로그를 출력하는 핸들러 """
+
+    def __init__(self, stream=None):
+        super().__init__(stream or sys.stdout)
+
+
+def is_json_log_mode():
+    """ 배포 환경에서 LOG_FORMAT=json으로 설정되어 있는지 여부 """
+    return settings.configured and getattr(settings, "LOG_JSON", False)
+
+
 class CustomLogger(logging.Logger):
     """ 로그를 로그 출력 시 pretty format 적용 """
 
@@ -93,6 +188,10 @@ class CustomLogger(logging.Logger):
         logging.Logger.manager.loggerDict[name] = self
 
     def out(self, msg, max_string, max_length):
+        # json 로그는 formatter에서 직렬화하므로 pretty format을 적용하지 않음
+        if is_json_log_mode():
+            return msg
+
         return pretty_repr(msg, max_width=get_console().size.width, max_string=max_string, max_length=max_length).strip(" '\"")
 
     def debug(self, msg="",  *args, max_string=200, max_length=None, **kwargs):
@@ -124,17 +223,26 @@ class CustomLogger(logging.Logger):
         return super().findCaller(stack_info, stacklevel=4)
 
 
+def set_request_context(record):
+    """ record에 request 정보 추가, writer process에서 받은 record처럼 context가 없으면 기존 값 유지 """
+    if context := request_context.get():
+        record.userinfo = context.userinfo
+        record.user_id = context.user_id
+        record.request_id = context.request_id
+        record.request_path = context.path
+
+    elif not hasattr(record, "userinfo"):
+        record.userinfo = '-'
+        record.user_id = None
+        record.request_id = None
+        record.request_path = None
+
+
 class DefaultFormatter(logging.Formatter):
     """ logging에 user 정보를 추가하는 formatter """
 
     def set_record(self, record):
-        try:
-            from .middleware import local
-            request = getattr(local, 'django_request', None)
-            record.userinfo = str(request.user)
-
-        except:
-            record.userinfo = '-'
+        set_request_context(record)
 
         try:
             record.filepath = "/".join(record.pathname.replace("\\", "/").rsplit("/", 2)[1:])
@@ -180,6 +288,53 @@ class ConsoleFormatter(DefaultFormatter):
         return self.colorizer(record)
 
 
+def dumps_json(data):
+    if orjson:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class JSONFormatter(DefaultFormatter):
+    """
+    log record를 한 줄의 json 문자열로 변환하는 formatter
+    RequestLogMiddleware처럼 dict를 로깅한 경우 data 필드에 그대로 담고 status, runtime은 상위 필드로 올림
+    """
+
+    def format(self, record):
+        self.set_record(record)
+
+        log = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": record.request_id,
+            "user_id": record.user_id,
+            "path": record.request_path,
+            "file": record.filepath,
+            "line": record.lineno,
+            "func": record.funcName,
+        }
+
+        if isinstance(record.msg, dict):
+            data = record.msg
+            log["status"] = data.get("status")
+            log["runtime"] = data.get("runtime")
+            log["data"] = data
+        else:
+            log["message"] = record.getMessage()
+
+        if record.exc_info:
+            log["exc_info"] = self.formatException(record.exc_info)
+
+        if record.stack_info:
+            log["stack_info"] = self.formatStack(record.stack_info)
+
+        return dumps_json(log)
+
+
 logger = CustomLogger("console_debug")
 silence_logger = CustomLogger("no_output_console")
 request_logger = CustomLogger("request_log")
+# 분석용 request log, CustomLogger의 pretty format을 거치지 않도록 기본 logger 사용
+access_logger = logging.getLogger("request_access")
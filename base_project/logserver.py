@@ -0,0 +1,114 @@
+import os
+import copy
+import time
+import pickle
+import signal
+import struct
+import logging
+import logging.config
+import threading
+import socketserver
+import multiprocessing
+
+
+class LogRecordStreamHandler(socketserver.StreamRequestHandler):
+    """ worker 하나의 연결에서 length-prefix로 전송된 log record를 읽어 writer에 전달 """
+
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                break
+
+            length = struct.unpack(">L", header)[0]
+            data = self.rfile.read(length)
+            if len(data) < length:
+                break
+
+            record = logging.makeLogRecord(pickle.loads(data))
+            logging.getLogger(record.name).handle(record)
+
+
+class LogRecordServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+
+        super().__init__(path, LogRecordStreamHandler)
+
+
+def configure_writer():
+    """
+    worker의 LOGGING과 같은 이름의 logger를 settings.LOG_WRITER_HANDLERS(기존 file handler 설정)로 구성
+    전달받은 record는 logger 이름에 따라 general.log / access.log 등 원래 파일에 기록됨
+    rotate, 압축, 보관 기간 관리는 해당 handler(logger.TimedRotatingFileHandler)에서 처리
+    """
+    from django.conf import settings
+
+    handlers = settings.LOG_WRITER_HANDLERS
+    loggers = {}
+
+    for name, config in settings.LOGGING["loggers"].items():
+        if names := [handler for handler in config.get("handlers", []) if handler in handlers]:
+            loggers[name] = {"handlers": names, "level": "DEBUG", "propagate": False}
+
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": copy.deepcopy(settings.LOGGING["formatters"]),
+        "handlers": copy.deepcopy(handlers),
+        "loggers": loggers,
+    })
+
+
+def serve(path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'base_project.settings')
+
+    # 종료는 gunicorn master의 on_exit에서 SIGTERM으로 처리
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    configure_writer()
+    server = LogRecordServer(path)
+
+    def shutdown(signum, frame):
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+        logging.shutdown()
+
+
+def start(path, timeout=5):
+    """
+    log writer process 실행
+    gunicorn master에서 worker를 fork 하기 전에 호출해야 하며, socket이 생성될 때까지 대기
+    """
+    directory, _ = os.path.split(path)
+    if directory:
+        os.path.isdir(directory) or os.makedirs(directory)
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    process = multiprocessing.Process(target=serve, args=(path, ), name="log-writer", daemon=True)
+    process.start()
+
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path) and process.is_alive() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    return process
+
+
+def stop(process, timeout=5):
+    if process.is_alive():
+        process.terminate()
+        process.join(timeout)
@@ -0,0 +1,133 @@
+import os
+import re
+import glob
+import gzip
+import json
+import math
+from collections import defaultdict
+from functools import lru_cache
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.urls import resolve, Resolver404
+
+# 5% 오차의 log scale bucket, 파일 크기와 상관없이 endpoint 당 수백 개의 bucket만 유지
+BUCKET_BASE = 1.05
+ID_SEGMENT_RE = re.compile(r"/(?:\d+|[0-9a-f]{32}|[0-9a-f-]{36})(?=/|$)", re.I)
+
+
+class LatencyStats:
+    """ count, error 수, latency histogram을 보관하며 process 간에 합칠 수 있음 """
+    __slots__ = ("count", "errors", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.buckets = defaultdict(int)
+
+    def add(self, runtime_ms, status):
+        self.count += 1
+        if status >= 500:
+            self.errors += 1
+
+        self.buckets[int(math.log(runtime_ms, BUCKET_BASE)) if runtime_ms > 1 else 0] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.errors += other.errors
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] += count
+
+    def percentile(self, percent):
+        threshold = self.count * percent / 100
+        seen = 0
+
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return BUCKET_BASE ** (bucket + 1) if bucket else 1.0
+
+        return 0.0
+
+
+@lru_cache(maxsize=4096)
+def normalize_path(path):
+    """ route 정보가 없는 log는 url resolver 또는 id segment 치환으로 route pattern을 추정 """
+    try:
+        return resolve(path).route
+    except Resolver404:
+        return ID_SEGMENT_RE.sub("/<id>", path)
+
+
+def open_log(filename):
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt", encoding="utf-8")
+
+    return open(filename, "r", encoding="utf-8")
+
+
+def analyze_file(filename):
+    """ 파일을 한 줄씩 읽어 (endpoint, user_class) 별 통계를 반환 """
+    stats = defaultdict(LatencyStats)
+
+    with open_log(filename) as f:
+        for line in f:
+            try:
+                data = json.loads(line)["data"]
+                endpoint = f'{data["method"]} {data["route"] or normalize_path(data["path"])}'
+                runtime_ms = data["runtime"] * 1000
+                status = int(data["status"])
+            except (ValueError, KeyError, TypeError):
+                continue
+
+            stats[(endpoint, data.get("user_class", "-"))].add(runtime_ms, status)
+            stats[(endpoint, "*")].add(runtime_ms, status)
+
+    return dict(stats)
+
+
+class Command(BaseCommand):
+    help = "request log(ACCESS_LOGFILE)를 읽어 endpoint / 사용자 유형별 요청 수, error rate, p50/p95/p99 latency를 출력"
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="*", help="분석할 log 파일, 지정하지 않으면 ACCESS_LOGFILE과 rotate 된 파일 전체")
+        parser.add_argument("--processes", type=int, default=os.cpu_count(), help="파일이 여러 개일 때 사용할 process 수")
+        parser.add_argument("--top", type=int, default=50, help="요청 수 기준 상위 n개 endpoint만 출력")
+        parser.add_argument("--by-user-class", action="store_true", help="사용자 유형(anonymous / user / staff)별로 나누어 출력")
+
+    def handle(self, *args, **options):
+        files = options["files"] or sorted(x for x in glob.glob(f"{settings.ACCESS_LOGFILE}*") if not x.endswith(".tmp"))
+        if not files:
+            self.stderr.write("분석할 log 파일이 없습니다.")
+            return
+
+        total = defaultdict(LatencyStats)
+        processes = max(1, min(options["processes"], len(files)))
+
+        if processes == 1:
+            results = map(analyze_file, files)
+        else:
+            pool = Pool(processes)
+            results = pool.imap_unordered(analyze_file, files)
+
+        for result in results:
+            for key, stats in result.items():
+                total[key].merge(stats)
+
+        if processes > 1:
+            pool.close()
+            pool.join()
+
+        rows = [
+            (endpoint, user_class, stats) for (endpoint, user_class), stats in total.items()
+            if (user_class != "*") == options["by_user_class"]
+        ]
+        rows.sort(key=lambda x: x[2].count, reverse=True)
+
+        self.stdout.write(f"{'endpoint':60} {'user':10} {'count':>8} {'error':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for endpoint, user_class, stats in rows[:options["top"]]:
+            self.stdout.write(
+                f"{endpoint[:60]:60} {user_class:10} {stats.count:>8} {stats.errors / stats.count:>7.2%} "
+                f"{stats.percentile(50):>7.1f}ms {stats.percentile(95):>7.1f}ms {stats.percentile(99):>7.1f}ms"
+            )
@@ -0,0 +1,89 @@
+import time
+from itertools import cycle, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.cache.backends.redis import RedisSerializer
+from django.utils.module_loading import import_string
+
+from rest_framework.renderers import JSONRenderer
+
+from base_project import cache_serializer
+from base_project.cache_serializer import CacheSerializer
+
+
+def make_page(serializer_class, instances, page_size):
+    """ serializer의 page 응답과 같은 형태의 data, instance가 page_size보다 적으면 반복하여 사용 """
+    return {
+        "count": page_size * 10,
+        "next": "http://localhost/api/?page=2",
+        "previous": None,
+        "results": serializer_class(list(islice(cycle(instances), page_size)), many=True).data,
+    }
+
+
+def make_rendered_entry(page):
+    """ caching_view가 저장하는 (render 된 응답, content type, etag) 형태 """
+    content = JSONRenderer().render(page)
+    return [content, "application/json", '"etag"'], 0.0, 0.0
+
+
+def measure(func, value, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(value)
+
+    return result, (time.perf_counter() - start) / repeat * 1000000
+
+
+class Command(BaseCommand):
+    help = "serializer의 page 응답을 기준으로 cache serializer(pickle / CacheSerializer)의 크기와 dumps / loads 시간 비교"
+
+    payloads = {
+        "data": lambda page: page,
+        "rendered": make_rendered_entry,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("serializer", help="비교에 사용할 ModelSerializer (예: user.serializers.UserSerializer)")
+        parser.add_argument("--page-size", type=int, nargs="+", default=[10, 100, 1000])
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            serializer_class = import_string(options["serializer"])
+        except ImportError as e:
+            raise CommandError(e) from e
+
+        # serializer의 model 데이터 중 가장 큰 page 크기만큼 사용
+        model = serializer_class.Meta.model
+        if not (instances := list(model._default_manager.all()[:max(options["page_size"])])):
+            raise CommandError(f"{model.__name__} 데이터가 없습니다.")
+
+        serializers = {
+            "pickle (RedisSerializer)": RedisSerializer(),
+            "pickle + zlib": CacheSerializer(codec="pickle"),
+        }
+
+        # msgpack이 없으면 CacheSerializer가 pickle을 사용하므로 비교에서 제외
+        if cache_serializer.msgpack is None:
+            self.stderr.write("msgpack이 설치되어 있지 않아 msgpack 비교는 제외합니다.")
+        else:
+            serializers["msgpack"] = CacheSerializer(threshold=float("inf"), codec="msgpack")
+            serializers["msgpack + zlib"] = CacheSerializer(codec="msgpack")
+
+        self.stdout.write(f"{'page':>6} {'payload':10} {'serializer':26} {'size':>10} {'dumps':>10} {'loads':>10}")
+        for page_size in options["page_size"]:
+            page = make_page(serializer_class, instances, page_size)
+
+            for payload_name, make_payload in self.payloads.items():
+                payload = make_payload(page)
+
+                for name, serializer in serializers.items():
+                    dumped, dumps_time = measure(serializer.dumps, payload, options["repeat"])
+                    loaded, loads_time = measure(serializer.loads, dumped, options["repeat"])
+                    assert loaded == payload or list(loaded) == list(payload)
+
+                    self.stdout.write(
+                        f"{page_size:>6} {payload_name:10} {name:26} {len(dumped):>10,} "
+                        f"{dumps_time:>8.1f}us {loads_time:>8.1f}us"
+                    )
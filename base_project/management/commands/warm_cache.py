@@ -0,0 +1,90 @@
+import glob
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from base_project.management.commands.analyze_request_log import open_log
+from base_project.middleware import CACHE_WARM_META_KEY
+
+
+def read_frequent_paths(files, top):
+    """ request log에서 성공한 GET 요청의 path + query string을 빈도순으로 반환 """
+    counter = Counter()
+
+    for filename in files:
+        with open_log(filename) as f:
+            for line in f:
+                try:
+                    data = json.loads(line)["data"]
+                    if data["method"] != "GET" or int(data["status"]) != 200 or data["user_class"] != "anonymous":
+                        continue
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+                query = data.get("query")
+                counter[f'{data["path"]}?{query}' if query else data["path"]] += 1
+
+    return [path for path, _ in counter.most_common(top)]
+
+
+def warm(paths, concurrency=4):
+    """
+    path 목록을 현재 process 안에서 django test client로 요청하여 caching_view의 캐싱 데이터를 미리 생성
+    로그인하지 않은 요청만 재현하므로 by_user=True인 view는 anonymous 응답만 캐싱됨
+    """
+    def request(path):
+        # thread 별 client 사용, ALLOWED_HOSTS에 포함된 host로 요청
+        # access log에 기록되어 다음 warm 대상 선정에 영향을 주지 않도록 표시
+        client = Client(raise_request_exception=False, HTTP_HOST="localhost", **{CACHE_WARM_META_KEY: True})
+        start = time.perf_counter()
+        try:
+            status = client.get(path).status_code
+        except Exception as e:
+            status = f"error({e.__class__.__name__})"
+        finally:
+            # gunicorn master에서 실행되는 경우 fork 된 worker가 연결을 공유하지 않도록 종료
+            connections.close_all()
+
+        return path, status, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max(1, concurrency)) as executor:
+        return list(executor.map(request, paths))
+
+
+class Command(BaseCommand):
+    help = "자주 요청된 GET path를 미리 요청하여 캐싱 데이터 생성 (배포 / cache 초기화 직후 사용)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="요청할 path, 지정하지 않으면 request log(ACCESS_LOGFILE)의 상위 path")
+        parser.add_argument("--file", help="한 줄에 하나씩 path가 적힌 파일")
+        parser.add_argument("--top", type=int, default=100, help="request log에서 사용할 상위 path 수")
+        parser.add_argument("--concurrency", type=int, default=4, help="동시에 요청할 수")
+
+    def handle(self, *args, **options):
+        paths = list(options["paths"])
+
+        if options["file"]:
+            with open(options["file"], "r", encoding="utf-8") as f:
+                paths += [line.strip() for line in f if line.strip()]
+
+        if not paths:
+            files = sorted(x for x in glob.glob(f"{settings.ACCESS_LOGFILE}*") if not x.endswith(".tmp"))
+            paths = read_frequent_paths(files, options["top"])
+
+        if not paths:
+            self.stderr.write("요청할 path가 없습니다.")
+            return
+
+        start = time.perf_counter()
+        results = warm(paths, options["concurrency"])
+
+        for path, status, runtime in results:
+            self.stdout.write(f"{status} {runtime * 1000:>8.1f}ms {path}")
+
+        self.stdout.write(f"{len(results)} paths warmed in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,290 @@
+import os
+import glob
+import json
+import mmap
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+INITIAL_MMAP_SIZE = 1024 * 1024
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_registry = []
+_stores = {}
+
+
+class MmapedDict:
+    """
+    key -> float 값을 저장하는 mmap 파일
+    header(8 byte, 사용 중인 byte 수) 뒤에 [key 길이(4 byte)][key(8 byte 단위 padding)][value(double)] 형태로 저장
+    """
+
+    def __init__(self, filename, read_mode=False):
+        self._f = open(filename, "rb" if read_mode else "a+b")
+        self._fname = filename
+        capacity = os.fstat(self._f.fileno()).st_size
+
+        if capacity == 0:
+            self._f.truncate(INITIAL_MMAP_SIZE)
+            capacity = INITIAL_MMAP_SIZE
+
+        self._capacity = capacity
+        self._m = mmap.mmap(self._f.fileno(), self._capacity, access=mmap.ACCESS_READ if read_mode else mmap.ACCESS_WRITE)
+        self._positions = {}
+        self._used = min(struct.unpack_from("i", self._m, 0)[0], self._capacity)
+
+        if self._used == 0:
+            self._used = 8
+            if not read_mode:
+                struct.pack_into("i", self._m, 0, self._used)
+
+        else:
+            for key, _, pos in self._read_all():
+                self._positions[key] = pos
+
+    def _read_all(self):
+        data, used, pos = self._m, self._used, 8
+
+        while pos < used:
+            encoded_len = struct.unpack_from("i", data, pos)[0]
+            if encoded_len + pos > used:
+                break
+
+            pos += 4
+            key = data[pos:pos + encoded_len].decode("utf-8")
+            padded_len = encoded_len + (8 - (encoded_len + 4) % 8)
+            pos += padded_len
+            value = struct.unpack_from("d", data, pos)[0]
+            yield key, value, pos
+            pos += 8
+
+    def read_all_values(self):
+        for key, value, _ in self._read_all():
+            yield key, value
+
+    def _init_value(self, key):
+        encoded = key.encode("utf-8")
+        padding = 8 - (len(encoded) + 4) % 8
+        value = struct.pack(f"=i{len(encoded)}s{padding}xd", len(encoded), encoded, 0.0)
+
+        if self._used + len(value) > self._capacity:
+            while self._used + len(value) > self._capacity:
+                self._capacity *= 2
+
+            self._f.truncate(self._capacity)
+            self._m.close()
+            self._m = mmap.mmap(self._f.fileno(), self._capacity)
+
+        self._m[self._used:self._used + len(value)] = value
+
+        # entry를 모두 쓴 뒤 사용량을 갱신하여 읽는 쪽에서 불완전한 entry를 보지 않도록 함
+        self._used += len(value)
+        struct.pack_into("i", self._m, 0, self._used)
+        self._positions[key] = self._used - 8
+
+    def read_value(self, key):
+        if key not in self._positions:
+            self._init_value(key)
+
+        return struct.unpack_from("d", self._m, self._positions[key])[0]
+
+    def write_value(self, key, value):
+        if key not in self._positions:
+            self._init_value(key)
+
+        struct.pack_into("d", self._m, self._positions[key], value)
+
+    def close(self):
+        if self._f:
+            self._m.close()
+            self._f.close()
+            self._f = None
+
+
+class ValueStore:
+    """
+    현재 process의 metric 파일, fork 된 worker에서는 pid가 바뀌므로 새 파일을 연다
+    각 worker는 METRICS_DIR 아래 `{type}_{pid}.db` 파일에만 기록하므로 process 간 lock이 필요 없음
+    """
+
+    def __init__(self, file_prefix):
+        self.file_prefix = file_prefix
+        self._pid = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _get_file(self):
+        if (pid := os.getpid()) != self._pid:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            self._file = MmapedDict(os.path.join(settings.METRICS_DIR, f"{self.file_prefix}_{pid}.db"))
+            self._pid = pid
+
+        return self._file
+
+    def inc(self, key, amount):
+        with self._lock:
+            file_ = self._get_file()
+            file_.write_value(key, file_.read_value(key) + amount)
+
+
+class Metric:
+    type = None
+    file_prefix = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # 같은 종류의 metric은 하나의 파일을 공유
+        self._store = _stores.setdefault(self.file_prefix, ValueStore(self.file_prefix))
+        _registry.append(self)
+
+    def _key(self, sample_name, labels, extra=None):
+        labels = dict(zip(self.labelnames, labels))
+        if extra:
+            labels.update(extra)
+
+        return json.dumps([self.name, sample_name, labels], separators=(",", ":"))
+
+    def _inc(self, sample_name, labels, amount, extra=None):
+        if settings.METRICS:
+            self._store.inc(self._key(sample_name, labels, extra), amount)
+
+
+class Counter(Metric):
+    type = "counter"
+    file_prefix = "counter"
+
+    def inc(self, *labels, amount=1):
+        self._inc(f"{self.name}_total", labels, amount)
+
+
+class Gauge(Metric):
+    """ 살아있는 worker의 값만 합산되는 gauge """
+    type = "gauge"
+    file_prefix = "gauge"
+
+    def inc(self, *labels, amount=1):
+        self._inc(self.name, labels, amount)
+
+    def dec(self, *labels, amount=1):
+        self._inc(self.name, labels, -amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+    file_prefix = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value, *labels):
+        if not settings.METRICS:
+            return
+
+        for bound in self.buckets:
+            if value <= bound:
+                self._inc(f"{self.name}_bucket", labels, 1, {"le": format_float(bound)})
+                break
+
+        self._inc(f"{self.name}_sum", labels, value)
+        self._inc(f"{self.name}_count", labels, 1)
+
+
+def format_float(value):
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value))
+
+
+def escape_label(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def format_sample(sample_name, labels, value):
+    if labels:
+        labels = ",".join(f'{label}="{escape_label(label_value)}"' for label, label_value in labels.items())
+        return f"{sample_name}{{{labels}}} {format_float(value)}"
+
+    return f"{sample_name} {format_float(value)}"
+
+
+def collect():
+    """ METRICS_DIR의 모든 worker 파일을 읽어 metric / sample 별로 합산 """
+    samples = defaultdict(float)
+
+    for filename in glob.glob(os.path.join(settings.METRICS_DIR, "*.db")):
+        try:
+            file_ = MmapedDict(filename, read_mode=True)
+        except (OSError, ValueError):
+            continue
+
+        try:
+            for key, value in file_.read_all_values():
+                name, sample_name, labels = json.loads(key)
+                samples[(name, sample_name, tuple(sorted(labels.items())))] += value
+        finally:
+            file_.close()
+
+    return samples
+
+
+def generate_latest():
+    """ prometheus text exposition format 문자열 반환 """
+    samples = collect()
+    output = []
+
+    for metric in _registry:
+        output.append(f"# HELP {metric.name} {metric.documentation}")
+        output.append(f"# TYPE {metric.name} {metric.type}")
+
+        metric_samples = sorted((key, value) for key, value in samples.items() if key[0] == metric.name)
+
+        if metric.type != "histogram":
+            for (_, sample_name, labels), value in metric_samples:
+                output.append(format_sample(sample_name, dict(labels), value))
+            continue
+
+        # bucket은 구간별로 저장되어 있으므로 누적값으로 변환
+        series = defaultdict(dict)
+        for (_, sample_name, labels), value in metric_samples:
+            labels = dict(labels)
+            le = labels.pop("le", None)
+            series[tuple(labels.items())][(sample_name, le)] = value
+
+        for labels, values in series.items():
+            cumulative = 0
+            for bound in metric.buckets:
+                le = format_float(bound)
+                cumulative += values.get((f"{metric.name}_bucket", le), 0)
+                output.append(format_sample(f"{metric.name}_bucket", {**dict(labels), "le": le}, cumulative))
+
+            output.append(format_sample(f"{metric.name}_sum", dict(labels), values.get((f"{metric.name}_sum", None), 0)))
+            output.append(format_sample(f"{metric.name}_count", dict(labels), values.get((f"{metric.name}_count", None), 0)))
+
+    return "\n".join(output) + "\n"
+
+
+def mark_process_dead(pid):
+    """ 종료된 worker의 gauge 파일 삭제, gunicorn child_exit hook에서 호출 """
+    for filename in glob.glob(os.path.join(settings.METRICS_DIR, f"gauge_{pid}.db")):
+        os.remove(filename)
+
+
+def reset():
+    """ 이전 실행에서 남은 metric 파일 삭제, gunicorn master 시작 시 호출 """
+    for filename in glob.glob(os.path.join(settings.METRICS_DIR, "*.db")):
+        os.remove(filename)
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route.", ["method", "route"])
+REQUEST_COUNT = Counter("http_requests", "Requests by route and status code.", ["method", "route", "status"])
+DB_QUERY_COUNT = Counter("db_queries", "Database queries by route.", ["route"])
+CACHE_REQUEST_COUNT = Counter("cache_requests", "Cache reads by result.", ["result"])
+CACHE_STAMPEDE_COUNT = Counter("cache_stampede_events", "Cached view stampede protection events.", ["event"])
+FILESERVER_BYTES_SENT = Counter("fileserver_bytes_sent", "Bytes streamed by the fileserver.")
+FILESERVER_ACTIVE_STREAMS = Gauge("fileserver_active_streams", "Fileserver streams currently open.")
@@ -2,15 +2,33 @@ import time
 import json
 import threading
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
 from django.conf import settings
-from django.contrib.auth import get_user
 
 from rest_framework.status import is_client_error, is_server_error
 
-from base_project.logger import request_logger
+from base_project.logger import request_logger, access_logger
+from base_project.context import RequestContext, request_context
+from base_project import timing
+from base_project import metrics
+from base_project import query_inspector
+from base_project import profiler
 
 MEDIA_URL = settings.MEDIA_URL
-local = threading.local()
+# warm_cache command의 요청, request 분석(analyze_request_log / warm_cache) 대상이 아니므로 access log에 기록하지 않음
+# client가 header로 보낼 수 없도록 HTTP_ prefix가 없는 META key 사용
+CACHE_WARM_META_KEY = "base_project.cache_warm"
+
+
+def get_logged_query(request):
+    """ profiling token(__profile)을 제외한 query string """
+    return "&".join(x for x in request.META.get("QUERY_STRING", "").split("&") if x and not x.startswith("__profile="))
+
+
+def get_logged_path(request):
+    query = get_logged_query(request)
+    return f"{request.path}?{query}" if query else request.path
 
 
 class RequestLogMiddleware:
@@ -26,7 +44,7 @@ class RequestLogMiddleware:
         log_data = {
             "remote_address": request.META["REMOTE_ADDR"],
             "request_method": request.method,
-            "request_path": request.get_full_path(),
+            "request_path": get_logged_path(request),
             "content_type": request.content_type,
         }
 
@@ -70,7 +88,7 @@ class RequestLogMiddleware:
 
         self.response_log = {
             "status": response.status_code,
-            "user_info": str(request.user),
+            "user_info": context.userinfo if (context := request_context.get()) else "-",
         }
 
         if is_logging and not is_server_error(response.status_code):
@@ -79,9 +97,27 @@ class RequestLogMiddleware:
             except:
                 self.response_log["response_body"] = ""
 
+        if timer := getattr(request, "timing", None):
+            self.response_log["timing"] = timer.as_dict()
+
         self.response_log["runtime"] = time.time() - self.start_time
         request_logger.debug(self.response_log, max_length=5)
 
+        if request.META.get(CACHE_WARM_META_KEY):
+            return response
+
+        context = request_context.get()
+        access_logger.info({
+            "method": request.method,
+            "path": request.path,
+            # profiling token은 기록하지 않음
+            "query": get_logged_query(request),
+            "route": request.resolver_match.route if request.resolver_match else None,
+            "status": response.status_code,
+            "runtime": self.response_log["runtime"],
+            "user_class": context.user_class if context else "-",
+        })
+
         return response
 
     def process_response(self, request, response):
@@ -89,11 +125,226 @@ class RequestLogMiddleware:
 
 
 class LoggedInUserMiddleware:
-    """user info를 logging 하기 위해 사용"""
+    """
+    user info를 logging 하기 위해 사용
+    request 정보를 contextvars에 저장하므로 sync / async 환경 모두에서 request별로 분리됨
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def set_context(self, request):
+        context = RequestContext(request)
+        request.request_id = context.request_id
+        return request_context.set(context)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = self.set_context(request)
+        try:
+            return self.get_response(request)
+        finally:
+            request_context.reset(token)
+
+    async def __acall__(self, request):
+        token = self.set_context(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            request_context.reset(token)
+
+
+class ServerTimingMiddleware:
+    """
+    request 별 db / cache / serializer / render 소요 시간을 측정하여 Server-Timing header로 반환
+    settings.REQUEST_TIMING이 True인 경우에만 MIDDLEWARE에 추가되며, 측정 결과는 request log에도 기록됨
+    """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        timing.install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        request.timing = timing.RequestTimer()
+        token = timing.request_timer.set(request.timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.request_timer.reset(token)
+
+        response["Server-Timing"] = request.timing.server_timing()
+        return response
+
+    async def __acall__(self, request):
+        request.timing = timing.RequestTimer()
+        token = timing.request_timer.set(request.timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.request_timer.reset(token)
+
+        response["Server-Timing"] = request.timing.server_timing()
+        return response
+
+
+class MetricsMiddleware:
+    """
+    route 별 응답 시간, status code, db query 수, cache hit/miss를 metrics 파일에 기록
+    settings.METRICS가 True인 경우에만 MIDDLEWARE에 추가되며, ServerTimingMiddleware가 있다면 같은 timer를 사용
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        timing.install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        if getattr(request, "timing", None):
+            return None
+
+        request.timing = timing.RequestTimer()
+        return timing.request_timer.set(request.timing)
+
+    def finish(self, request, response):
+        timer = request.timing
+        route = request.resolver_match.route if request.resolver_match else "unmatched"
+
+        metrics.REQUEST_LATENCY.observe(timer.total_time / 1000, request.method, route)
+        metrics.REQUEST_COUNT.inc(request.method, route, response.status_code)
+        metrics.DB_QUERY_COUNT.inc(route, amount=timer.db_count)
+
+        if timer.cache_hits:
+            metrics.CACHE_REQUEST_COUNT.inc("hit", amount=timer.cache_hits)
+        if timer.cache_misses:
+            metrics.CACHE_REQUEST_COUNT.inc("miss", amount=timer.cache_misses)
 
     def __call__(self, request):
-        setattr(local, 'django_request', request)
-        return self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            if token:
+                timing.request_timer.reset(token)
+
+        self.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token:
+                timing.request_timer.reset(token)
+
+        self.finish(request, response)
+        return response
+
+
+class QueryInspectorMiddleware:
+    """
+    request 별로 N+1 query와 slow query를 검사하고 view에 선언된 query_budget 초과 여부 확인
+    settings.QUERY_INSPECTOR가 True인 경우에만 MIDDLEWARE에 추가됨
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        query_inspector.install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if state := getattr(request, "query_inspection", None):
+            state.budget = query_inspector.get_query_budget(view_func, request)
+
+    def start(self, request):
+        request.query_inspection = query_inspector.QueryInspection(
+            label=f"{request.method} {request.path}",
+            parent=query_inspector.inspection.get(),
+        )
+        return query_inspector.inspection.set(request.query_inspection)
+
+    def finish(self, request, token):
+        query_inspector.inspection.reset(token)
+        request.query_inspection.report()
+        request.query_inspection.check_budget()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(request, token)
+
+        return response
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(request, token)
+
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    admin 페이지에서 발급한 token이 X-Profile-Token header 또는 __profile query parameter로 전달된 request만 profiling
+    sampling 결과는 PROFILER_DIR에 collapsed stack 형식으로 저장되며 admin 페이지에서 조회 / 다운로드 가능
+    settings.PROFILER가 True인 경우에만 MIDDLEWARE에 추가됨
+    middleware가 실행되는 thread를 sampling 하므로 async_capable = False
+    (async 요청(uvicorn worker)에서도 django가 thread에서 실행하며, 뒤의 sync view도 같은 thread에서 실행됨)
+    """
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def start(self, request):
+        if not profiler.is_profiling_requested(request):
+            return None
+
+        return profiler.StackSampler(threading.get_ident(), settings.PROFILER_INTERVAL).start()
+
+    def finish(self, request, response, samples):
+        filename = profiler.save_profile(request, samples)
+        response["X-Profile"] = filename
+        return response
+
+    def __call__(self, request):
+        if not (sampler := self.start(request)):
+            return self.get_response(request)
+
+        # 예외가 발생해도 sampling thread는 종료
+        try:
+            response = self.get_response(request)
+        finally:
+            samples = sampler.stop()
+
+        return self.finish(request, response, samples)
@@ -1,7 +1,15 @@
+import json
+
+from django.db import connections
 from rest_framework import pagination
 from rest_framework.response import Response
 from functools import lru_cache
 
+from base_project.logger import logger
+
+# PostgreSQL 외의 DB에서 count="estimate"인 경우 이 개수까지만 COUNT
+ESTIMATE_COUNT_LIMIT = 10000
+
 
 class PageNumberPagination(pagination.PageNumberPagination):
     """
@@ -26,3 +34,90 @@ class PageNumberPagination(pagination.PageNumberPagination):
 @lru_cache
 def get_pagination_class(page_size):
     return type('DynamicPageNumberPagination', (PageNumberPagination, ), {"page_size": page_size})
+
+
+def estimate_count(queryset):
+    """
+    COUNT(*) 없이 queryset의 대략적인 row 수
+    PostgreSQL은 query plan의 예상 row 수, 그 외에는 ESTIMATE_COUNT_LIMIT까지만 count
+    """
+    queryset = queryset.order_by()
+
+    if connections[queryset.db].vendor == "postgresql":
+        plan = json.loads(queryset.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    return queryset[:ESTIMATE_COUNT_LIMIT].count()
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    keyset pagination, OFFSET / COUNT(*) 없이 마지막 항목의 정렬 값 이후를 조회하므로 page가 깊어져도 느려지지 않음
+    PageNumberPagination과 같은 형태로 응답하며 page_count / page_number는 None
+    get_cursor_pagination_class 함수를 통해 동적으로 page_size, count를 설정하여 사용
+
+    - ordering : viewset queryset의 정렬(예: -id)을 사용, cursor 위치는 첫 번째 field로만 계산하므로 unique 하거나 거의 unique 한 field여야 함
+      pk가 없으면 첫 번째 field와 같은 방향의 pk를 추가하여 같은 값 사이의 순서를 고정
+      (정렬이 없거나 관계 field 정렬인 경우 -pk, fulltext 검색의 rank 등 expression 정렬은 사용할 수 없어 경고 후 -pk)
+    - count : None이면 count를 계산하지 않음, "estimate"이면 estimate_count, "exact"이면 COUNT(*)
+    """
+    ordering = "-pk"
+    count = None
+
+    def get_ordering(self, request, queryset, view):
+        if any(hasattr(x, "get_ordering") for x in getattr(view, "filter_backends", [])):
+            return super().get_ordering(request, queryset, view)
+
+        ordering = []
+        for field in queryset.query.order_by or queryset.model._meta.ordering:
+            if not isinstance(field, str):
+                if not ordering:
+                    logger.warning(f"{type(view).__name__} : cursor pagination can't order by {field}, using {self.ordering}")
+                break
+
+            if "__" in field or field.lstrip("-") == "?":
+                break
+
+            ordering.append(field)
+
+        if not ordering:
+            return (self.ordering, )
+
+        pk_names = {"pk", queryset.model._meta.pk.name}
+        if not any(field.lstrip("-") in pk_names for field in ordering):
+            ordering.append("-pk" if ordering[0].startswith("-") else "pk")
+
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total_count = None
+        if self.count == "exact":
+            self.total_count = queryset.count()
+        elif self.count == "estimate":
+            self.total_count = estimate_count(queryset)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "links": {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link()
+            },
+            "count": self.total_count,
+            "page_count": None,
+            "page_number": None,
+            "page_size": self.page_size,
+            "results": data,
+        })
+
+
+@lru_cache
+def get_cursor_pagination_class(page_size, count=None):
+    """
+    get_pagination_class와 같은 응답 형태의 cursor pagination
+
+    Example:
+        pagination_class = get_cursor_pagination_class(20, count="estimate")
+    """
+    return type('DynamicCursorPagination', (CursorPagination, ), {"page_size": page_size, "count": count})
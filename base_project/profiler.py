@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = "base_project.profiler"
+FILENAME_RE = re.compile(r"[^\w.-]+")
+
+
+class StackSampler:
+    """
+    대상 thread의 stack을 일정 간격으로 수집하는 sampling profiler
+    별도 thread에서 sys._current_frames()를 읽기 때문에 대상 thread의 실행에는 관여하지 않음
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if frame := sys._current_frames().get(self.thread_id):
+                self.samples[self.collapse(frame)] += 1
+
+    @staticmethod
+    def collapse(frame):
+        stack = []
+        while frame:
+            code = frame.f_code
+            filepath = "/".join(code.co_filename.replace("\\", "/").rsplit("/", 2)[1:])
+            stack.append(f"{code.co_name} ({filepath}:{code.co_firstlineno})")
+            frame = frame.f_back
+
+        return ";".join(reversed(stack))
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+def make_token(user):
+    """ admin 페이지에서 발급하는 profiling token, PROFILER_TOKEN_MAX_AGE 동안 유효 """
+    return signing.dumps(user.pk, salt=TOKEN_SALT)
+
+
+def get_token(request):
+    return request.headers.get("X-Profile-Token") or request.GET.get("__profile")
+
+
+def is_profiling_requested(request):
+    if not (token := get_token(request)):
+        return False
+
+    try:
+        signing.loads(token, salt=TOKEN_SALT, max_age=settings.PROFILER_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+
+    return True
+
+
+def save_profile(request, samples):
+    """ flamegraph.pl / speedscope 에서 읽을 수 있는 collapsed stack 형식으로 저장 """
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+
+    path = FILENAME_RE.sub("_", request.path.strip("/")) or "root"
+    request_id = getattr(request, "request_id", "")
+    filename = f"{time.strftime('%Y%m%d%H%M%S')}_{request.method}_{path}_{request_id}".rstrip("_")[:200] + ".folded"
+
+    with open(os.path.join(settings.PROFILER_DIR, filename), "w", encoding="utf-8") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+    return filename
+
+
+def get_profiles():
+    if not os.path.isdir(settings.PROFILER_DIR):
+        return []
+
+    profiles = []
+    for entry in os.scandir(settings.PROFILER_DIR):
+        if entry.is_file() and entry.name.endswith(".folded"):
+            stat = entry.stat()
+            profiles.append({"name": entry.name, "size": stat.st_size, "created": datetime.fromtimestamp(stat.st_mtime)})
+
+    return sorted(profiles, key=lambda x: x["created"], reverse=True)
+
+
+def get_profile_path(filename):
+    """ profile 디렉토리 밖의 파일에 접근하지 못하도록 파일명만 사용 """
+    filename = os.path.basename(filename)
+    path = os.path.join(settings.PROFILER_DIR, filename)
+
+    if not filename.endswith(".folded") or not os.path.isfile(path):
+        return None
+
+    return path
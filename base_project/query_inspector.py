@@ -0,0 +1,194 @@
+import re
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from base_project.logger import logger
+
+inspection = ContextVar("query_inspection", default=None)
+
+IN_CLAUSE_RE = re.compile(r"\bIN\s*\((?:\s*%s\s*,?)+\)", re.I)
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+WHITESPACE_RE = re.compile(r"\s+")
+
+IGNORED_ORIGIN_PATHS = ("site-packages", "/django/", "/rest_framework/", "query_inspector.py")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """ parameter, 숫자, 문자열, IN 절 길이가 달라도 같은 형태의 query는 같은 값이 되도록 정규화 """
+    sql = IN_CLAUSE_RE.sub("IN (...)", sql)
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    return WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def get_origin():
+    """ query를 실행한 프로젝트 코드의 위치 """
+    for frame in reversed(traceback.extract_stack()):
+        if any(path in frame.filename for path in IGNORED_ORIGIN_PATHS):
+            continue
+
+        return f"{frame.filename}:{frame.lineno} in {frame.name}()"
+
+    return "-"
+
+
+def explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return " / ".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+
+    except Exception as e:
+        return f"EXPLAIN failed : {e}"
+
+
+class QueryInspection:
+    """
+    request(또는 assert_max_queries 블록) 하나에서 실행된 query 집계
+    같은 fingerprint가 N_PLUS_ONE_THRESHOLD 이상 반복되면 N+1로 판단
+    """
+
+    def __init__(self, budget=None, label="-", parent=None):
+        self.budget = budget
+        self.label = label
+        self.parent = parent
+        self.count = 0
+        self.fingerprints = {}
+        self.origins = {}
+        self.explaining = False
+
+    def record(self, sql, params, duration, connection):
+        self.count += 1
+        parent = self.parent
+        while parent:
+            parent.count += 1
+            parent = parent.parent
+
+        key = fingerprint(sql)
+        repeated = self.fingerprints[key] = self.fingerprints.get(key, 0) + 1
+
+        # 반복 여부가 확인된 시점에만 stack을 추적
+        if repeated == settings.N_PLUS_ONE_THRESHOLD:
+            self.origins[key] = get_origin()
+
+        if duration >= settings.SLOW_QUERY_MS:
+            message = f"Slow query ({duration:.1f}ms) at {get_origin()} | {self.label} | {sql}"
+
+            if settings.QUERY_EXPLAIN:
+                self.explaining = True
+                try:
+                    message += f" | EXPLAIN : {explain(connection, sql, params)}"
+                finally:
+                    self.explaining = False
+
+            logger.warning(message, max_string=None)
+
+    def report(self):
+        for key, repeated in self.fingerprints.items():
+            if repeated >= settings.N_PLUS_ONE_THRESHOLD:
+                logger.warning(
+                    f"N+1 query suspected ({repeated}x) at {self.origins.get(key, '-')} | {self.label} | {key}",
+                    max_string=None,
+                )
+
+    def check_budget(self):
+        if self.budget is None or self.count <= self.budget:
+            return
+
+        message = f"{self.label} executed {self.count} queries, over the budget of {self.budget}"
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+
+        logger.error(message)
+
+
+def inspector_wrapper(execute, sql, params, many, context):
+    if (state := inspection.get()) is None or state.explaining:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state.record(sql, params, (time.perf_counter() - start) * 1000, context["connection"])
+
+
+def add_inspector_wrapper(connection, **kwargs):
+    if inspector_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(inspector_wrapper)
+
+
+def install():
+    connection_created.connect(add_inspector_wrapper, dispatch_uid="query_inspector")
+    for connection in connections.all(initialized_only=True):
+        add_inspector_wrapper(connection)
+
+
+def query_budget(budget):
+    """
+    view / viewset action에 허용되는 최대 query 수 지정
+    viewset class에 query_budget 속성을 직접 선언할 수도 있음
+
+    Example:
+        class UserViewSet(viewsets.ModelViewSet):
+            query_budget = 5
+
+            @query_budget(10)
+            @action(detail=False, methods=["GET"])
+            def some_function(self, request):
+                ...
+    """
+    def decorator(view_func):
+        view_func.query_budget = budget
+        return view_func
+
+    return decorator
+
+
+def get_query_budget(view_func, request):
+    if (budget := getattr(view_func, "query_budget", None)) is not None:
+        return budget
+
+    if (view_class := getattr(view_func, "cls", None)) is None:
+        return None
+
+    action = getattr(view_func, "actions", {}).get(request.method.lower())
+    handler = getattr(view_class, action or request.method.lower(), None)
+
+    return getattr(handler, "query_budget", getattr(view_class, "query_budget", None))
+
+
+@contextmanager
+def assert_max_queries(budget, label="assert_max_queries"):
+    """
+    테스트에서 블록 안의 query 수가 budget을 넘으면 QueryBudgetExceeded 발생
+
+    Example:
+        with assert_max_queries(3):
+            self.client.get("/api/user/")
+    """
+    install()
+    state = QueryInspection(budget, label, parent=inspection.get())
+    token = inspection.set(state)
+    try:
+        yield state
+    finally:
+        inspection.reset(token)
+
+    state.report()
+    if state.count > budget:
+        raise QueryBudgetExceeded(f"{label} executed {state.count} queries, over the budget of {budget}")
@@ -0,0 +1,201 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.relations import RelatedField, ManyRelatedField, SlugRelatedField
+
+from base_project.logger import logger
+from base_project.utils import get_select_related_fields, get_prefetch_related_fields
+
+
+class RelatedPlan:
+    """
+    serializer가 조회하는 model의 field와 relation
+    only가 None인 경우 사용하는 field를 알 수 없음 (SerializerMethodField, property 등)
+    """
+    __slots__ = ("model", "select", "prefetch", "only")
+
+    def __init__(self, model):
+        self.model = model
+        self.select = {}
+        self.prefetch = {}
+        self.only = {model._meta.pk.name}
+
+    def add(self, name):
+        if self.only is not None:
+            self.only.add(name)
+
+    def child(self, kind, name, model):
+        children = self.select if kind == "select" else self.prefetch
+        if name not in children:
+            children[name] = RelatedPlan(model)
+
+        return children[name]
+
+    def get_only(self):
+        """ Prefetch queryset의 only()에 사용할 field, select_related 하는 model의 field 포함 """
+        if self.only is None:
+            return None
+
+        fields = set(self.only)
+        for name, child in self.select.items():
+            if (child_fields := child.get_only()) is None:
+                return None
+
+            fields.update(f"{name}__{field}" for field in child_fields)
+
+        return fields
+
+
+def get_relation(model, name):
+    """
+    (select / prefetch, 관계 field, lookup 이름)
+    relation이 아니면 (None, field 또는 None, None)
+    """
+    meta = model._meta
+
+    for relation in meta.related_objects:
+        if relation.get_accessor_name() == name:
+            break
+    else:
+        try:
+            relation = meta.get_field(name)
+        except FieldDoesNotExist:
+            return None, None, None
+
+        if not relation.is_relation:
+            return None, relation, None
+
+    if relation.concrete:
+        query_name = relation.name
+    elif hasattr(relation, "get_accessor_name"):
+        query_name = relation.field.related_query_name()
+    else:
+        # GenericForeignKey 등
+        return None, None, None
+
+    if query_name in get_select_related_fields(model):
+        return "select", relation, query_name
+
+    if name in get_prefetch_related_fields(model):
+        return "prefetch", relation, name
+
+    return None, None, None
+
+
+def walk_serializer(serializer, plan):
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        # source="*"인 nested serializer는 같은 instance를 사용
+        if field.source == "*":
+            if isinstance(field, BaseSerializer):
+                walk_serializer(field.child if isinstance(field, ListSerializer) else field, plan)
+            else:
+                plan.only = None
+            continue
+
+        walk_field(field, field.source_attrs, plan)
+
+
+def walk_field(field, attrs, plan):
+    name, rest = attrs[0], attrs[1:]
+    kind, relation, lookup = get_relation(plan.model, name)
+
+    if kind is None:
+        if relation is not None and relation.concrete:
+            plan.add(relation.name)
+        else:
+            plan.only = None
+        return
+
+    # PrimaryKeyRelatedField 등은 fk 값만 사용하므로 join 하지 않음
+    if not rest and isinstance(field, RelatedField) and field.use_pk_only_optimization() and relation.concrete \
+            and not relation.many_to_many:
+        plan.add(relation.name)
+        return
+
+    if kind == "select" and relation.concrete:
+        plan.add(relation.name)
+
+    child = plan.child(kind, lookup, relation.related_model)
+
+    # 역참조를 prefetch 하는 경우 instance를 연결하기 위한 fk 필요
+    if kind == "prefetch" and not relation.concrete and relation.one_to_many:
+        child.add(relation.field.name)
+
+    if rest:
+        walk_field(field, rest, child)
+
+    elif isinstance(field, BaseSerializer):
+        walk_serializer(field.child if isinstance(field, ListSerializer) else field, child)
+
+    elif isinstance(field, ManyRelatedField):
+        walk_related_field(field.child_relation, child)
+
+    else:
+        walk_related_field(field, child)
+
+
+def walk_related_field(field, plan):
+    if isinstance(field, RelatedField) and field.use_pk_only_optimization():
+        return
+
+    if isinstance(field, SlugRelatedField) and "__" not in field.slug_field:
+        plan.add(field.slug_field)
+        return
+
+    # StringRelatedField(__str__) 등은 사용하는 field를 알 수 없음
+    plan.only = None
+
+
+def get_lookups(plan, prefix=""):
+    select, prefetch = [], []
+
+    for name, child in plan.select.items():
+        path = f"{prefix}{name}"
+        select.append(path)
+
+        child_select, child_prefetch = get_lookups(child, f"{path}__")
+        select += child_select
+        prefetch += child_prefetch
+
+    for name, child in plan.prefetch.items():
+        child_select, child_prefetch = get_lookups(child)
+
+        queryset = child.model._default_manager.all()
+        if child_select:
+            queryset = queryset.select_related(*child_select)
+        if child_prefetch:
+            queryset = queryset.prefetch_related(*child_prefetch)
+        if (only := child.get_only()) is not None:
+            queryset = queryset.only(*only)
+
+        prefetch.append(Prefetch(f"{prefix}{name}", queryset=queryset))
+
+    return select, prefetch
+
+
+@lru_cache(maxsize=None)
+def get_related_lookups(serializer_class, model):
+    """
+    serializer의 field(nested serializer, source 경로 포함)가 사용하는 relation의 (select_related, prefetch_related) 목록
+    prefetch_related는 serializer가 사용하는 field만 only()로 조회하는 Prefetch, serializer class 별로 한 번만 계산
+
+    Example:
+        select, prefetch = get_related_lookups(PostSerializer, Post)
+        Post.objects.select_related(*select).prefetch_related(*prefetch)
+    """
+    plan = RelatedPlan(model)
+
+    try:
+        walk_serializer(serializer_class(), plan)
+    except Exception as e:
+        logger.warning(f"Failed to inspect {serializer_class.__name__} relations : {e}")
+        return (), ()
+
+    select, prefetch = get_lookups(plan)
+    return tuple(select), tuple(prefetch)
@@ -0,0 +1,27 @@
+import os
+import hashlib
+
+SOURCE_EXTENSIONS = (".py", ".html")
+IGNORED_DIRS = {"venv", ".venv", "node_modules", "media", "static", "log", "__pycache__"}
+
+
+def get_code_hash(base_dir):
+    """
+    소스 코드(.py, template)의 hash, 코드가 같으면 어느 instance에서 계산해도 같은 값
+    RELEASE 환경변수가 없을 때 배포 버전으로 사용
+    """
+    digest = hashlib.blake2b(digest_size=8)
+
+    for root, dirs, files in os.walk(base_dir):
+        dirs[:] = sorted(x for x in dirs if x not in IGNORED_DIRS and not x.startswith("."))
+
+        for filename in sorted(files):
+            if not filename.endswith(SOURCE_EXTENSIONS):
+                continue
+
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, base_dir).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
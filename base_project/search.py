@@ -0,0 +1,410 @@
+import re
+import sys
+import time
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.migrations.operations.base import Operation
+from django.db.models import FloatField, AutoField, BigAutoField, IntegerField
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+
+from base_project.caching import get_generation, get_model_namespace
+from base_project.logger import logger
+
+SEARCH_VECTOR_COLUMN = "search_vector"
+DEFAULT_CONFIG = "simple"
+TOKEN_RE = re.compile(r"\w+")
+
+# 다른 worker의 변경으로 prefix index를 다시 만드는 최소 간격(초), 그 사이에는 이전 index로 검색
+PREFIX_INDEX_REFRESH_INTERVAL = 60
+PREFIX_SEARCH_LIMIT = 1000
+
+
+def get_fts_table(db_table):
+    return f"{db_table}_fts"
+
+
+def get_index_name(db_table):
+    return f"{db_table}_{SEARCH_VECTOR_COLUMN}_idx"
+
+
+def get_tokens(value):
+    # 검색어의 특수문자가 MATCH / tsquery 문법으로 해석되지 않도록 단어만 사용
+    return TOKEN_RE.findall(value)
+
+
+@lru_cache(maxsize=None)
+def has_fulltext_index(alias, db_table):
+    """ CreateFullTextIndex migration이 적용되었는지 확인 (process 당 한 번) """
+    connection = connections[alias]
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            columns = connection.introspection.get_table_description(cursor, db_table)
+            return any(column.name == SEARCH_VECTOR_COLUMN for column in columns)
+
+        if connection.vendor == "sqlite":
+            return get_fts_table(db_table) in connection.introspection.table_names(cursor)
+
+    return False
+
+
+class CreateFullTextIndex(Operation):
+    """
+    model의 fields에 대한 full-text 검색 index를 생성하는 migration operation
+    model 당 하나의 index만 사용하며, SearchQuerysetMixin의 type "fulltext" 검색의 fields와 같은 fields를 지정
+
+    - PostgreSQL : fields를 합친 tsvector generated column(search_vector)과 GIN index
+    - SQLite : external content FTS5 table({db_table}_fts)과 insert / update / delete 시 동기화하는 trigger
+
+    Example:
+        from base_project.search import CreateFullTextIndex
+
+        class Migration(migrations.Migration):
+            dependencies = [("user", "0001_initial")]
+            operations = [CreateFullTextIndex("user", ["fullname", "email"])]
+    """
+    reversible = True
+
+    def __init__(self, model_name, fields, config=DEFAULT_CONFIG):
+        self.model_name = model_name
+        self.fields = list(fields)
+        self.config = config
+
+    def deconstruct(self):
+        return self.__class__.__name__, [self.model_name, self.fields], {"config": self.config}
+
+    def state_forwards(self, app_label, state):
+        # model field가 아닌 database object만 생성하므로 state는 변경하지 않음
+        pass
+
+    def get_columns(self, model):
+        return [model._meta.get_field(field).column for field in self.fields]
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        vendor = schema_editor.connection.vendor
+        quote = schema_editor.quote_name
+        table = model._meta.db_table
+        columns = self.get_columns(model)
+
+        if vendor == "postgresql":
+            document = " || ' ' || ".join(f"coalesce({quote(column)}, '')" for column in columns)
+            schema_editor.execute(
+                f"ALTER TABLE {quote(table)} ADD COLUMN {quote(SEARCH_VECTOR_COLUMN)} tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('{self.config}', {document})) STORED"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX {quote(get_index_name(table))} ON {quote(table)} USING GIN ({quote(SEARCH_VECTOR_COLUMN)})"
+            )
+
+        elif vendor == "sqlite":
+            fts_table = quote(get_fts_table(table))
+            pk = quote(model._meta.pk.column)
+            column_list = ", ".join(quote(column) for column in columns)
+            new_values = ", ".join(f"new.{quote(column)}" for column in columns)
+            old_values = ", ".join(f"old.{quote(column)}" for column in columns)
+            delete = f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.{pk}, {old_values});"
+            insert = f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.{pk}, {new_values});"
+
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {fts_table} USING fts5({column_list}, content={quote(table)}, content_rowid={pk})"
+            )
+            schema_editor.execute(f"CREATE TRIGGER {quote(f'{table}_fts_ai')} AFTER INSERT ON {quote(table)} BEGIN {insert} END")
+            schema_editor.execute(f"CREATE TRIGGER {quote(f'{table}_fts_ad')} AFTER DELETE ON {quote(table)} BEGIN {delete} END")
+            schema_editor.execute(
+                f"CREATE TRIGGER {quote(f'{table}_fts_au')} AFTER UPDATE ON {quote(table)} BEGIN {delete} {insert} END"
+            )
+            # 기존 데이터로 index 생성
+            schema_editor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+        has_fulltext_index.cache_clear()
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        vendor = schema_editor.connection.vendor
+        quote = schema_editor.quote_name
+        table = model._meta.db_table
+
+        if vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {quote(get_index_name(table))}")
+            schema_editor.execute(f"ALTER TABLE {quote(table)} DROP COLUMN IF EXISTS {quote(SEARCH_VECTOR_COLUMN)}")
+
+        elif vendor == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {quote(f'{table}_fts_{suffix}')}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {quote(get_fts_table(table))}")
+
+        has_fulltext_index.cache_clear()
+
+    def describe(self):
+        return f"Create full-text index on {self.model_name} ({', '.join(self.fields)})"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_fulltext"
+
+
+def fulltext_search(queryset, value, config=DEFAULT_CONFIG):
+    """
+    CreateFullTextIndex로 생성한 index를 사용하여 검색
+    각 단어의 prefix가 모두 일치하는 row를 (pk__in 조건, 순위 expression)으로 반환
+    index가 없거나 검색어에 단어가 없으면 None
+
+    - PostgreSQL : to_tsquery('단어':* & ...), ts_rank 순위
+    - SQLite : FTS5 MATCH '"단어"* "단어"*', bm25 순위 (값이 작을수록 관련도가 높으므로 부호를 바꿈)
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    pk = quote(model._meta.pk.column)
+
+    if not (tokens := get_tokens(value)) or not has_fulltext_index(queryset.db, table):
+        return None
+
+    if connection.vendor == "postgresql":
+        query = " & ".join(f"'{token}':*" for token in tokens)
+        match = f"{quote(SEARCH_VECTOR_COLUMN)} @@ to_tsquery(%s, %s)"
+        condition = RawSQL(f"SELECT {pk} FROM {quote(table)} WHERE {match}", [config, query])
+        rank = RawSQL(
+            f"ts_rank({quote(table)}.{quote(SEARCH_VECTOR_COLUMN)}, to_tsquery(%s, %s))",
+            [config, query],
+            output_field=FloatField(),
+        )
+
+    else:
+        fts_table = quote(get_fts_table(table))
+        query = " ".join(f'"{token}"*' for token in tokens)
+        condition = RawSQL(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s", [query])
+        rank = RawSQL(
+            f"(SELECT -bm25({fts_table}) FROM {fts_table} WHERE {fts_table} MATCH %s AND rowid = {quote(table)}.{pk})",
+            [query],
+            output_field=FloatField(),
+        )
+
+    return condition, rank
+
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ["", *"ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"]
+# 입력 중에는 겹받침 / 이중모음이 나뉘어 입력되므로 (닭 : 달 -> 닭) 기본 자모로 분해
+COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ", "ㄾ": "ㄹㅌ",
+    "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ", "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ",
+    "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+
+def _decompose(text):
+    return "".join(COMPOUND_JAMO.get(x, x) for x in text)
+
+
+JAMO_TABLE = {
+    0xAC00 + i: _decompose(CHOSEONG[i // 588] + JUNGSEONG[i // 28 % 21] + JONGSEONG[i % 28])
+    for i in range(11172)
+}
+JAMO_TABLE.update({ord(jamo): decomposed for jamo, decomposed in COMPOUND_JAMO.items()})
+
+
+def normalize_prefix(value):
+    """ 소문자 변환 후 한글 음절을 자모로 분해, 입력 중인 음절(홍기 -> 홍길)도 prefix로 일치 """
+    return str(value).casefold().translate(JAMO_TABLE).strip()
+
+
+def get_prefix_terms(values):
+    """ 각 field 값 전체와 값에 포함된 단어들 """
+    terms = set()
+    for value in values:
+        if value is None or not (value := normalize_prefix(value)):
+            continue
+
+        terms.add(value)
+        terms.update(TOKEN_RE.findall(value))
+
+    return terms
+
+
+class PrefixIndex:
+    """
+    model fields 값의 prefix 검색을 위한 worker 별 in-memory index
+    정규화된 term의 정렬된 list와 같은 순서의 pk array로 구성되며, bisect로 prefix 범위를 찾음
+
+    - 같은 worker의 변경은 post_save / post_delete signal로 해당 row만 갱신
+    - 다른 worker의 변경은 model generation(caching.get_model_namespace)이 바뀐 것으로 확인하여
+      PREFIX_INDEX_REFRESH_INTERVAL 이후 다시 생성 (그 전에는 이전 index로 검색하며, 결과는 pk__in으로 DB에서 조회)
+    - 생성은 한 번에 하나의 thread만 하며, 생성 중인 다른 요청은 이전 index(처음 생성 중이면 None)로 응답
+    - 크기가 SEARCH_PREFIX_INDEX_MAX_BYTES를 넘으면 사용하지 않음 (None 반환)
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = list(fields)
+        self.namespace = get_model_namespace(model)
+        self.compact_pk = isinstance(model._meta.pk, (AutoField, BigAutoField, IntegerField))
+        self.lock = threading.RLock()
+        self.generation = None
+        self.built_at = None
+        self.building = False
+        self.disabled = False
+        self.clear()
+
+    def clear(self):
+        self.terms = []
+        self.pks = array("q") if self.compact_pk else []
+        self.entries = {}
+        self.size = 0
+
+    def get_term_size(self, term):
+        # term 문자열 + list / array의 pointer, pk
+        return sys.getsizeof(term) + 16
+
+    def build(self, generation):
+        start = time.perf_counter()
+        rows = []
+        size = 0
+        entries = {}
+
+        for pk, *values in self.model._default_manager.values_list("pk", *self.fields).iterator(chunk_size=2000):
+            entries[pk] = terms = tuple(get_prefix_terms(values))
+            rows.extend((term, pk) for term in terms)
+            size += sum(self.get_term_size(term) for term in terms)
+
+            if size > settings.SEARCH_PREFIX_INDEX_MAX_BYTES:
+                logger.warning(f"Prefix index for {self.namespace} exceeds SEARCH_PREFIX_INDEX_MAX_BYTES, using icontains")
+                with self.lock:
+                    self.clear()
+                    self.disabled = True
+                    self.generation, self.built_at = generation, time.monotonic()
+                return
+
+        rows.sort()
+
+        with self.lock:
+            self.clear()
+            self.terms = [term for term, _ in rows]
+            self.pks.extend(pk for _, pk in rows)
+            self.entries = entries
+            self.size = size
+            self.disabled = False
+            self.generation, self.built_at = generation, time.monotonic()
+
+        logger.info(f"Prefix index for {self.namespace} built : {len(rows)} terms, {size} bytes, {time.perf_counter() - start:.3f}s")
+
+    def refresh(self):
+        generation = get_generation(self.namespace)
+        if generation == self.generation:
+            return
+
+        if self.built_at is not None and time.monotonic() - self.built_at < PREFIX_INDEX_REFRESH_INTERVAL:
+            return
+
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+
+        try:
+            self.build(generation)
+        finally:
+            with self.lock:
+                self.building = False
+
+    def remove(self, pk):
+        with self.lock:
+            for term in self.entries.pop(pk, ()):
+                index = bisect_left(self.terms, term)
+                while index < len(self.terms) and self.terms[index] == term:
+                    if self.pks[index] == pk:
+                        del self.terms[index]
+                        del self.pks[index]
+                        self.size -= self.get_term_size(term)
+                        break
+                    index += 1
+
+    def update(self, pk, values):
+        with self.lock:
+            if self.disabled or self.built_at is None:
+                return
+
+            self.remove(pk)
+            if values is None:
+                return
+
+            self.entries[pk] = terms = tuple(get_prefix_terms(values))
+            for term in terms:
+                index = bisect_right(self.terms, term)
+                self.terms.insert(index, term)
+                self.pks.insert(index, pk)
+                self.size += self.get_term_size(term)
+
+            if self.size > settings.SEARCH_PREFIX_INDEX_MAX_BYTES:
+                logger.warning(f"Prefix index for {self.namespace} exceeds SEARCH_PREFIX_INDEX_MAX_BYTES, using icontains")
+                self.clear()
+                self.disabled = True
+
+    def applied(self, pk, values):
+        """ transaction commit 이후 호출, 이 변경으로 증가한 generation은 다시 생성하지 않도록 반영 """
+        self.update(pk, values)
+
+        # caching.connect_signals의 on_commit이 먼저 등록되어 generation은 이미 증가한 상태
+        if self.generation is not None and get_generation(self.namespace) == self.generation + 1:
+            self.generation += 1
+
+    def on_save(self, sender, instance, using=None, **kwargs):
+        values = [getattr(instance, field) for field in self.fields]
+        transaction.on_commit(partial(self.applied, instance.pk, values), using=using)
+
+    def on_delete(self, sender, instance, using=None, **kwargs):
+        transaction.on_commit(partial(self.applied, instance.pk, None), using=using)
+
+    def connect(self):
+        uid = f"prefix_index_{self.model._meta.label}_{'_'.join(self.fields)}"
+        post_save.connect(self.on_save, sender=self.model, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(self.on_delete, sender=self.model, weak=False, dispatch_uid=f"{uid}_delete")
+
+    def search(self, value, limit=PREFIX_SEARCH_LIMIT):
+        """ value로 시작하는 term을 가진 pk 목록 (최대 limit개), index를 사용할 수 없으면 None """
+        self.refresh()
+
+        # 다른 thread가 처음 생성 중인 경우
+        if self.built_at is None or self.disabled or not (prefix := normalize_prefix(value)):
+            return None
+
+        pks = {}
+        with self.lock:
+            index = bisect_left(self.terms, prefix)
+            while index < len(self.terms) and self.terms[index].startswith(prefix) and len(pks) < limit:
+                pks[self.pks[index]] = None
+                index += 1
+
+        return list(pks)
+
+
+_prefix_indexes = {}
+_prefix_indexes_lock = threading.Lock()
+
+
+def get_prefix_index(model, fields):
+    key = (model._meta.label, tuple(fields))
+
+    with _prefix_indexes_lock:
+        if (index := _prefix_indexes.get(key)) is None:
+            index = _prefix_indexes[key] = PrefixIndex(model, fields)
+            index.connect()
+
+    return index
+
+
+def prefix_search(queryset, value, fields, limit=PREFIX_SEARCH_LIMIT):
+    """
+    PrefixIndex로 fields 값(또는 값의 단어)이 value로 시작하는 pk 목록을 반환
+    index를 사용할 수 없거나 검색어가 비어 있으면 None
+    """
+    return get_prefix_index(queryset.model, fields).search(value, limit)
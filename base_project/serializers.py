@@ -5,6 +5,7 @@ from rest_framework.serializers import BaseSerializer
 from rest_framework.exceptions import ErrorDetail, ValidationError
 
 from base_project import models
+from base_project.decorators import prefetch_cached_methods
 from base_project.fields import (
     FileField, CharField, BooleanField, DateField, DateTimeField,
     TimeField, DurationField, EmailField, IntegerField, FloatField,
@@ -75,12 +76,46 @@ class ModelSerializer(ResponseErrorSerializerMixin, serializers.ModelSerializer)
     serializer_related_field = PrimaryKeyRelatedField
     serializer_choice_field = ChoiceField
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Meta.cached_methods가 있으면 목록 serialize 전에 캐싱 데이터를 한 번에 조회
+        # class 정의 시 한 번만 설정하므로 요청 처리 중에 공유 Meta가 변경되지 않음
+        meta = cls.__dict__.get("Meta")
+        if getattr(meta, "cached_methods", None) and not hasattr(meta, "list_serializer_class"):
+            meta.list_serializer_class = CachedMethodListSerializer
+
 
 class ListSerializer(serializers.ListSerializer):
     def update(self, instance, validated_data):
         pass
 
 
+class CachedMethodListSerializer(ListSerializer):
+    """
+    child serializer의 Meta.cached_methods에 지정된 caching_model_method를 instance 전체에 대해 미리 조회
+    instance 수만큼 cache를 조회하지 않고 get_many / set_many 한 번으로 처리
+
+    Example:
+        class UserSerializer(serializers.ModelSerializer):
+            point = serializers.SerializerMethodField()
+
+            class Meta:
+                model = User
+                fields = "__all__"
+                cached_methods = ["get_point"]
+
+            def get_point(self, obj):
+                return obj.get_point(self.context["request"])
+    """
+
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, models.Manager) else data)
+        prefetch_cached_methods(instances, self.child.Meta.cached_methods, self.context.get("request"))
+
+        return super().to_representation(instances)
+
+
 class RawListSerializer(ListSerializer):
     @property
     def data(self):
@@ -7,6 +7,7 @@ from pathlib import Path
 from django.db.models import Field
 
 from base_project.logger import logger
+from base_project.release import get_code_hash
 
 IS_RUNSERVER = 'runserver' in sys.argv or sys.argv[0].rsplit("\\", maxsplit=1)[-1] == 'uvicorn'
 
@@ -18,6 +19,28 @@ SECRET_KEY = env.get('SECRET_KEY', ' ')
 DEBUG = env.get('DEBUG', '1') == '1'
 IS_LOCAL = env.get("IS_LOCAL", "1") == '1'  # local에서 test할 때 사용, 배포 환경에서는 False로 설정
 URL_MODE = os.environ.get('URL_MODE', 'ALL')
+LOG_FORMAT = env.get("LOG_FORMAT", "text")  # 배포 환경에서 json으로 설정 시 한 줄 단위 json 로그 출력
+LOG_JSON = LOG_FORMAT == "json" and not IS_LOCAL
+REQUEST_TIMING = env.get("REQUEST_TIMING", "0") == '1'  # request 별 db / cache / serializer / render 시간 측정 (Server-Timing header)
+METRICS = env.get("METRICS", "0") == '1'  # /metrics endpoint로 prometheus 형식의 metric 제공
+METRICS_DIR = env.get("METRICS_DIR", "log/metrics")  # worker 별 metric 파일이 저장되는 경로
+METRICS_TOKEN = env.get("METRICS_TOKEN", "")  # 설정 시 /metrics 요청에 Authorization: Bearer {token} 필요, 설정하지 않으면 local 요청만 허용
+IS_TEST = 'test' in sys.argv
+QUERY_INSPECTOR = env.get("QUERY_INSPECTOR", "0") == '1' or IS_TEST  # request 별 N+1 / slow query 검사
+QUERY_BUDGET_RAISE = IS_TEST  # 테스트 실행 시 view의 query_budget을 초과하면 예외 발생
+SLOW_QUERY_MS = float(env.get("SLOW_QUERY_MS", 200))
+N_PLUS_ONE_THRESHOLD = int(env.get("N_PLUS_ONE_THRESHOLD", 5))
+QUERY_EXPLAIN = env.get("QUERY_EXPLAIN", "0") == '1'  # slow query의 EXPLAIN 결과를 함께 기록
+PROFILER = env.get("PROFILER", "0") == '1'  # admin에서 발급한 token으로 특정 request를 sampling profiling
+LOG_SOCKET = env.get("LOG_SOCKET", "")  # 설정 시 gunicorn worker의 로그를 unix socket으로 모아 하나의 process에서 파일에 기록
+CACHE_LOCAL_TIMEOUT = int(env.get("CACHE_LOCAL_TIMEOUT", 0))  # 설정 시 redis 앞에 worker 별 LRU cache 사용 (최대 유지 시간, 초)
+WORKERS = int(env.get("GUNICORN_WORKERS", os.cpu_count() * 2 + 1))
+CACHE_SHARED_MEMORY = env.get("CACHE_SHARED_MEMORY", "0") == '1'  # redis 없이 worker 간에 공유되는 cache 사용 (gunicorn.conf.py에서 설정)
+RELEASE = env.get("RELEASE") or get_code_hash(BASE_DIR)  # cache key prefix로 사용, 배포마다 새 namespace 사용
+CACHE_STATS = env.get("CACHE_STATS", "0") == '1'  # caching_view / caching_model_method의 hit / miss 통계 수집 (admin에서 확인)
+CACHE_STATS_INTERVAL = 10  # worker 별로 누적한 통계를 cache에 반영하는 주기(초)
+CACHE_WARM = int(env.get("CACHE_WARM", 0))  # 설정 시 gunicorn 시작 시 request log의 상위 n개 GET 요청을 미리 캐싱
+SEARCH_PREFIX_INDEX_MAX_BYTES = int(env.get("SEARCH_PREFIX_INDEX_MAX_BYTES", 32 * 1024 * 1024))  # worker 별 prefix 검색 index 최대 크기, 초과 시 icontains로 검색
 if os.path.exists('.env'):
     from dotenv import read_dotenv
     read_dotenv(BASE_DIR)
@@ -62,6 +85,7 @@ INSTALLED_APPS = [
     'ckeditor',
 
     # apps
+    f'{PROJECT_NAME}.apps.BaseProjectConfig',
     'user',
     'fileserver',
 ]
@@ -103,6 +127,18 @@ MIDDLEWARE = [
     f'{PROJECT_NAME}.middleware.LoggedInUserMiddleware',  # logger formatter에서 request를 받아오기 위해 사용
 ]
 
+if PROFILER:
+    MIDDLEWARE.append(f'{PROJECT_NAME}.middleware.ProfilerMiddleware')
+
+if QUERY_INSPECTOR:
+    MIDDLEWARE.append(f'{PROJECT_NAME}.middleware.QueryInspectorMiddleware')
+
+if METRICS:
+    MIDDLEWARE.insert(1, f'{PROJECT_NAME}.middleware.MetricsMiddleware')
+
+if REQUEST_TIMING:
+    MIDDLEWARE.insert(1, f'{PROJECT_NAME}.middleware.ServerTimingMiddleware')
+
 if DEBUG or not IS_LOCAL:
     MIDDLEWARE.append(f'{PROJECT_NAME}.middleware.RequestLogMiddleware')
 
@@ -240,6 +276,10 @@ LOGIN_URL = '/admin/login/'
 
 """ loggging setting start """
 LOGFILE = 'log/general.log'
+ACCESS_LOGFILE = 'log/access.log'  # manage.py analyze_request_log에서 사용하는 json line 형식의 request log
+PROFILER_DIR = os.path.join(os.path.dirname(LOGFILE), 'profiles')
+PROFILER_INTERVAL = 0.005  # stack sampling 간격(초)
+PROFILER_TOKEN_MAX_AGE = 60 * 60  # profiling token 유효 시간(초)
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -276,6 +316,9 @@ LOGGING = {
             'format': '[{asctime}] | {levelname:7} | [{filepath}:{lineno}|{funcName}()] | {userinfo} | >> {message}',
             'style': '{',
         },
+        'json': {
+            '()': f'{PROJECT_NAME}.logger.JSONFormatter',
+        },
     },
 
     'handlers': {
@@ -309,6 +352,17 @@ LOGGING = {
             'formatter': 'file',
             'level': 'DEBUG',
         },
+        'access_file': {
+            'class': f'{PROJECT_NAME}.logger.TimedRotatingFileHandler',
+            'filename': ACCESS_LOGFILE,
+            'formatter': 'json',
+            'level': 'INFO',
+        },
+        'json': {
+            'class': f'{PROJECT_NAME}.logger.JSONLogHandler',
+            'formatter': 'json',
+            'level': 'DEBUG',
+        },
     },
     'loggers': {
         # default disable
@@ -336,6 +390,13 @@ LOGGING = {
             'handlers': ['request_log', 'file'],
         },
 
+        # 분석용 request log
+        'request_access': {
+            'level': 'INFO',
+            'handlers': ['access_file'],
+            'propagate': False,
+        },
+
         # database query log
         # 'django.db.backends': {
         #     'handlers': ['sql_query', ],
@@ -343,6 +404,24 @@ LOGGING = {
         # },
     },
 }
+
+# json 로그 모드에서는 rich handler 대신 json handler 사용
+if LOG_JSON:
+    for handler in ('console', 'debug_console', 'request_log', 'sql_query'):
+        LOGGING['handlers'][handler] = dict(LOGGING['handlers']['json'])
+
+    LOGGING['handlers']['no_output_console'] = {'class': 'logging.NullHandler'}
+    LOGGING['handlers']['file']['formatter'] = 'json'
+
+# worker는 socket으로 전송만 하고, 파일 기록/rotate/압축은 log writer process(base_project.logserver)에서 처리
+if LOG_SOCKET and not IS_LOCAL:
+    LOG_WRITER_HANDLERS = {}
+    for handler in ('file', 'access_file'):
+        LOG_WRITER_HANDLERS[handler] = LOGGING['handlers'][handler]
+        LOGGING['handlers'][handler] = {
+            'class': f'{PROJECT_NAME}.logger.LogSocketHandler',
+            'level': LOG_WRITER_HANDLERS[handler]['level'],
+        }
 """ loggging setting end """
 
 if REDIS_HOST := env.get('REDIS_HOST', ''):
@@ -353,8 +432,31 @@ if REDIS_HOST := env.get('REDIS_HOST', ''):
 
     CACHES = {
         "default": {
-            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "BACKEND": f"{PROJECT_NAME}.cache_backends.VersionedRedisCache",
             "LOCATION": host,
+            "OPTIONS": {
+                "serializer": f"{PROJECT_NAME}.cache_serializer.CacheSerializer",  # 1KB 이상의 값은 zlib 압축
+            },
+        }
+    }
+
+    if CACHE_LOCAL_TIMEOUT:
+        CACHES["default"]["BACKEND"] = f"{PROJECT_NAME}.cache_backends.TwoTierRedisCache"
+        CACHES["default"]["OPTIONS"].update({
+            "LOCAL_MAX_ENTRIES": int(env.get("CACHE_LOCAL_MAX_ENTRIES", 1000)),
+            "LOCAL_TIMEOUT": CACHE_LOCAL_TIMEOUT,
+        })
+
+# redis 없이 gunicorn으로 여러 worker를 실행하는 경우 worker 간에 공유되는 cache 사용
+elif CACHE_SHARED_MEMORY and WORKERS > 1 and os.name == "posix":
+    CACHES = {
+        "default": {
+            "BACKEND": f"{PROJECT_NAME}.cache_backends.SharedMemoryCache",
+            "LOCATION": env.get("CACHE_SHM_PATH", f"/dev/shm/{PROJECT_NAME}_cache" if os.path.isdir("/dev/shm") else "log/cache"),
+            "OPTIONS": {
+                "MAX_ENTRIES": int(env.get("CACHE_MAX_ENTRIES", 1024)),
+                "SLOT_SIZE": int(env.get("CACHE_SLOT_SIZE", 64 * 1024)),
+            },
         }
     }
 
@@ -365,6 +467,10 @@ else:
         }
     }
 
+# 배포 버전별 namespace, 이전 버전의 캐싱 데이터는 삭제하지 않고 timeout으로 만료
+for cache_config in CACHES.values():
+    cache_config["KEY_PREFIX"] = f"{PROJECT_NAME}:{RELEASE}"
+
 USE_L10N = False
 
 DATE_FORMAT = 'Y/m/d'
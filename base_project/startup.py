@@ -1,4 +1,6 @@
 import os
+import socket
+from io import StringIO
 
 import django
 from django.conf import settings
@@ -7,6 +9,7 @@ from base_project.logger import logger
 from django.conf import settings
 from django.db import connections
 from django.core.cache import caches
+from django.core.management import call_command
 from django.core.cache.backends.base import BaseCache
 from django.db.utils import OperationalError
 
@@ -45,17 +48,29 @@ def run():
     logger.info("@@ Cache Connection Status @@")
     for cache_name in settings.CACHES:
         cache = caches[cache_name]
+        # 다른 instance와 겹치지 않는 key로 확인, 배포 시 cache.clear()로 다른 instance의 캐싱 데이터를 지우지 않음
+        # 이전 배포의 캐싱 데이터는 KEY_PREFIX(RELEASE)가 달라 조회되지 않고 timeout으로 만료됨
+        health_key = f"startup:{socket.gethostname()}:{os.getpid()}"
         try:
-            cache.set('test_key', 'test_value', timeout=30)
-            if cache.get('test_key') == 'test_value':
+            cache.set(health_key, 'test_value', timeout=30)
+            if cache.get(health_key) == 'test_value':
                 logger.warning(f"Connected to {cache_name} cache")
             else:
                 logger.warning(f"Connection to {cache_name} cache failed")
+            cache.delete(health_key)
         except:
             logger.warning(f"Connection to {cache_name} cache failed")
         cache_backend = settings.CACHES[cache_name]['BACKEND'].replace('django.core.cache.backends.', '')
         logger.warning("##### CACHE INFO ####")
         logger.warning(f"BACKEND : {cache_backend}")
+        logger.warning(f"PREFIX  : {settings.CACHES[cache_name].get('KEY_PREFIX', '')}")
         logger.warning("#####################")
 
-    cache.clear()
+    if settings.CACHE_WARM:
+        logger.info("")
+        logger.info("@@ Cache Warming @@")
+        try:
+            call_command("warm_cache", top=settings.CACHE_WARM, stdout=StringIO())
+            logger.warning("Cache warming finished")
+        except Exception as e:
+            logger.warning(f"Cache warming failed : {e}")
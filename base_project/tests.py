@@ -0,0 +1,114 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory
+
+from base_project.cache_backends import TwoTierRedisCache, LocalBroker, VersionedRedisCache
+from base_project.cache_serializer import CacheSerializer, MAGIC
+from base_project.decorators import caching_view
+
+
+class MemoryRedisClient:
+    """ redis server 없이 TwoTierRedisCache를 테스트하기 위한 RedisCacheClient 대체 """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value, timeout):
+        self.data[key] = value
+
+    def delete(self, key):
+        return self.data.pop(key, None) is not None
+
+
+class TwoTierRedisCacheTest(SimpleTestCase):
+    def make_cache(self, client):
+        cache = TwoTierRedisCache("redis://localhost:6379", {
+            "OPTIONS": {
+                "BROKER": "base_project.cache_backends.LocalBroker",
+                "CHANNEL": f"test-{self.id()}",
+            },
+        })
+        cache._cache = client
+        return cache
+
+    def tearDown(self):
+        LocalBroker.subscribers.pop(f"test-{self.id()}", None)
+
+    def test_set_invalidates_other_local_cache(self):
+        client = MemoryRedisClient()
+        first, second = self.make_cache(client), self.make_cache(client)
+
+        first.set("key", "old")
+        self.assertEqual(second.get("key"), "old")
+
+        # redis 값만 바뀐 경우 second는 local cache의 값을 응답
+        client.data[second.make_key("key")] = "stale"
+        self.assertEqual(second.get("key"), "old")
+
+        first.set("key", "new")
+        self.assertEqual(second.get("key"), "new")
+
+    def test_delete_invalidates_other_local_cache(self):
+        client = MemoryRedisClient()
+        first, second = self.make_cache(client), self.make_cache(client)
+
+        first.set("key", "value")
+        self.assertEqual(second.get("key"), "value")
+
+        first.delete("key")
+        self.assertIsNone(second.get("key"))
+
+
+class MemoryRedis:
+    """ VersionedRedisCacheClient.get_client 대체 (redis-py client의 get / mget) """
+
+    def __init__(self, data):
+        self.data = data
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+
+class VersionedRedisCacheTest(SimpleTestCase):
+    def test_other_version_is_cache_miss(self):
+        cache_ = VersionedRedisCache("redis://localhost:6379", {
+            "OPTIONS": {"serializer": "base_project.cache_serializer.CacheSerializer"},
+        })
+        current = CacheSerializer().dumps("current")
+        other = bytes((MAGIC, 0xFF, 0)) + b"payload"
+
+        redis = MemoryRedis({"current": current, "other": other})
+        cache_._cache.get_client = lambda *args, **kwargs: redis
+
+        self.assertEqual(cache_._cache.get("other", "default"), "default")
+        self.assertEqual(cache_._cache.get_many(["current", "other", "missing"]), {"current": "current"})
+
+
+@caching_view(by_user=False)
+async def async_file_view(request, name):
+    return HttpResponse(f"hi {name}")
+
+
+class AsyncCachingViewTest(SimpleTestCase):
+    def tearDown(self):
+        cache.clear()
+
+    async def test_function_view_cached_by_path(self):
+        factory = RequestFactory()
+
+        response = await async_file_view(factory.get("/files/a"), name="a")
+        self.assertEqual(response.content, b"hi a")
+
+        response = await async_file_view(factory.get("/files/b"), name="b")
+        self.assertEqual(response.content, b"hi b")
+
+        # 같은 path는 캐싱된 응답
+        response = await async_file_view(factory.get("/files/a"), name="a")
+        self.assertEqual(response.content, b"hi a")
+        self.assertTrue(response.has_header("ETag"))
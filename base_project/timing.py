@@ -0,0 +1,183 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import import_string
+
+request_timer = ContextVar("request_timer", default=None)
+
+CACHE_READ_METHODS = ("get", "get_many")
+CACHE_WRITE_METHODS = ("set", "set_many", "add", "delete", "delete_many", "incr", "decr")
+
+
+class RequestTimer:
+    """
+    request 하나에서 사용된 db, cache, serializer, render 시간 집계
+    시간 단위는 ms
+    """
+    __slots__ = (
+        "start", "db_time", "db_count", "cache_time", "cache_hits", "cache_misses", "cache_writes",
+        "serializer_time", "render_time", "_cache_depth",
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.db_count = 0
+        self.cache_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_writes = 0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self._cache_depth = 0
+
+    @property
+    def total_time(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    @property
+    def cache_hit_ratio(self):
+        if not (reads := self.cache_hits + self.cache_misses):
+            return None
+
+        return self.cache_hits / reads
+
+    def as_dict(self):
+        return {
+            "total": round(self.total_time, 2),
+            "db": round(self.db_time, 2),
+            "db_count": self.db_count,
+            "cache": round(self.cache_time, 2),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_writes": self.cache_writes,
+            "serializer": round(self.serializer_time, 2),
+            "render": round(self.render_time, 2),
+        }
+
+    def server_timing(self):
+        """ Server-Timing header 값 """
+        metrics = [
+            f'db;dur={self.db_time:.2f};desc="{self.db_count} queries"',
+            f'cache;dur={self.cache_time:.2f};desc="{self.cache_hits} hit / {self.cache_misses} miss"',
+            f'ser;dur={self.serializer_time:.2f}',
+            f'render;dur={self.render_time:.2f}',
+            f'total;dur={self.total_time:.2f}',
+        ]
+        return ", ".join(metrics)
+
+
+def db_timing_wrapper(execute, sql, params, many, context):
+    if (timer := request_timer.get()) is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.db_time += (time.perf_counter() - start) * 1000
+        timer.db_count += 1
+
+
+def add_db_timing_wrapper(connection, **kwargs):
+    if db_timing_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_timing_wrapper)
+
+
+def timed_cache_method(func, is_read):
+    @wraps(func)
+    def _wrapped(self, *args, **kwargs):
+        timer = request_timer.get()
+
+        # LocMemCache.get_many -> get 처럼 내부에서 다시 호출되는 경우 중복 집계하지 않음
+        if timer is None or timer._cache_depth:
+            return func(self, *args, **kwargs)
+
+        timer._cache_depth += 1
+        start = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            timer._cache_depth -= 1
+            timer.cache_time += (time.perf_counter() - start) * 1000
+
+        if not is_read:
+            timer.cache_writes += 1
+
+        elif func.__name__ == "get_many":
+            timer.cache_hits += len(result)
+            timer.cache_misses += len(args[0] if args else kwargs["keys"]) - len(result)
+
+        elif result is (args[1] if len(args) > 1 else kwargs.get("default")):
+            timer.cache_misses += 1
+
+        else:
+            timer.cache_hits += 1
+
+        return result
+
+    _wrapped._request_timing = True
+    return _wrapped
+
+
+def timed_property(prop, attr):
+    def getter(self):
+        if (timer := request_timer.get()) is None:
+            return prop.fget(self)
+
+        start = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            setattr(timer, attr, getattr(timer, attr) + (time.perf_counter() - start) * 1000)
+
+    getter._request_timing = True
+    return property(getter, prop.fset, prop.fdel, prop.__doc__)
+
+
+def patch_cache_backends():
+    for alias in settings.CACHES:
+        backend_class = import_string(settings.CACHES[alias]["BACKEND"])
+
+        for name in CACHE_READ_METHODS + CACHE_WRITE_METHODS:
+            method = getattr(backend_class, name)
+            if getattr(method, "_request_timing", False):
+                continue
+
+            setattr(backend_class, name, timed_cache_method(method, name in CACHE_READ_METHODS))
+
+
+def patch_rest_framework():
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.response import Response
+
+    if not getattr(BaseSerializer.data.fget, "_request_timing", False):
+        BaseSerializer.data = timed_property(BaseSerializer.data, "serializer_time")
+
+    if not getattr(Response.rendered_content.fget, "_request_timing", False):
+        Response.rendered_content = timed_property(Response.rendered_content, "render_time")
+
+
+_installed = False
+
+
+def install():
+    """
+    db execute_wrapper, cache backend, serializer/render 계측 설치
+    REQUEST_TIMING이 켜져 있을 때 ServerTimingMiddleware에서 한 번만 호출되며, 꺼져 있다면 아무것도 patch 하지 않음
+    """
+    global _installed
+    if _installed:
+        return
+
+    connection_created.connect(add_db_timing_wrapper, dispatch_uid="request_timing")
+    for connection in connections.all(initialized_only=True):
+        add_db_timing_wrapper(connection)
+
+    patch_cache_backends()
+    patch_rest_framework()
+    _installed = True
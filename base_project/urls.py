@@ -16,6 +16,11 @@ urlpatterns = [
     path('api/fileserver/', include('fileserver.urls')),
 ]
 
+if settings.METRICS:
+    urlpatterns += [
+        path('metrics', views.metrics_view),
+    ]
+
 if settings.DEBUG:
     urlpatterns += [
         re_path(r"^%s(?P<path>.*)$" % re.escape(settings.STATIC_URL.lstrip("/")), views.static_serve),
@@ -1,7 +1,6 @@
 import re
 import os
 import uuid
-import json
 from datetime import datetime
 
 from django.utils.deconstruct import deconstructible
@@ -10,6 +9,7 @@ from django.core.mail import send_mail as django_send_mail
 from django.conf import settings
 
 from base_project.logger import logger
+from base_project.caching import bump_generation
 
 from smtplib import SMTPSenderRefused
 
@@ -76,32 +76,31 @@ def get_select_related_fields(model):
 def get_prefetch_related_fields(model):
     meta = model._meta
 
-    # many to many 제외 역참조
-    reverse_choices = [x.field.related_query_name() for x in meta.related_objects if not x.many_to_many and not x.one_to_one]
+    # many to many 제외 역참조, prefetch_related는 query name이 아닌 accessor name(related_name 또는 {model}_set) 사용
+    reverse_choices = [x.get_accessor_name() for x in meta.related_objects if not x.many_to_many and not x.one_to_one]
 
-    # many to many
+    # many to many, 역참조는 accessor name 사용
     manytomany_choices = [x.name for x in meta.many_to_many]
+    manytomany_choices += [x.get_accessor_name() for x in meta.related_objects if x.many_to_many]
 
     return reverse_choices + manytomany_choices
 
 
-def get_cached_list(view_info):
+def clear_cached_view(view_info):
     """
-    특정 view의 캐싱 목록 확인
+    특정 view의 캐싱 데이터 삭제
+    view의 generation을 증가시켜 이전 캐싱 데이터가 더 이상 조회되지 않도록 함
     """
-    cached_list_key = f"cached_{view_info}_list"
-    cached_list = cache.get(cached_list_key, "[]")
-    return cached_list_key, json.loads(cached_list)
+    bump_generation(view_info)
 
 
-def clear_cached_view(view_info):
+def clear_cached_model_method(model, method):
     """
-    특정 view의 캐싱 데이터 삭제
+    caching_model_method(using_cache_list=True)로 캐싱된 데이터 삭제
+    model은 model class 또는 class 이름, method는 method 이름
     """
-    cached_list_key, cached_list = get_cached_list(view_info)
-
-    cache.delete_many(cached_list)
-    cache.delete(cached_list_key)
+    model_name = model if isinstance(model, str) else model.__name__
+    bump_generation(f"{model_name}:{method}")
 
 
 def clear_all_cache():
@@ -6,14 +6,18 @@ from django.conf import settings
 from django.contrib.staticfiles import finders
 from django.utils.http import http_date
 from django.utils._os import safe_join
-from django.http.response import HttpResponseBadRequest
+from django.http import HttpResponse
+from django.http.response import HttpResponseBadRequest, HttpResponseForbidden
 from django.core.exceptions import ValidationError
 
 from rest_framework.views import exception_handler
 
 from base_project.serializers import ValidationError
+from base_project import metrics
 from fileserver.utils import sendfile
 
+LOCAL_ADDRESSES = ("127.0.0.1", "::1")
+
 
 async def static_serve(request, path, insecure=False, **kwargs):
     """
@@ -42,6 +46,21 @@ async def static_view(request, path, document_root=None, show_indexes=False):
     return await sendfile(request, path, root_path=settings.STATIC_ROOT)
 
 
+def metrics_view(request):
+    """
+    모든 worker의 metric을 합산하여 prometheus text format으로 반환
+    METRICS_TOKEN이 설정되지 않은 경우 local 요청만 허용
+    """
+    if settings.METRICS_TOKEN:
+        if request.headers.get("Authorization") != f"Bearer {settings.METRICS_TOKEN}":
+            return HttpResponseForbidden()
+
+    elif request.META.get("REMOTE_ADDR") not in LOCAL_ADDRESSES:
+        return HttpResponseForbidden()
+
+    return HttpResponse(metrics.generate_latest(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def list_to_string_exception_handler(exc, context):
     """
     list 형태의 exception info를 string으로 변환
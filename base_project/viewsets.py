@@ -1,10 +1,12 @@
 from django.core.exceptions import FieldError
-from django.db.models import Q
+from django.db.models import Q, F
 
 from rest_framework import viewsets
 from rest_framework.viewsets import mixins, ViewSet
 
 from base_project.logger import logger
+from base_project.related import get_related_lookups
+from base_project.search import DEFAULT_CONFIG, PREFIX_SEARCH_LIMIT, fulltext_search, prefix_search
 
 
 class SearchQuerysetMixin:
@@ -13,6 +15,10 @@ class SearchQuerysetMixin:
     아래 예시의 경우 ?category=main&search=keyword와 같은 요청에 대해
     각각 category, title/contents 필드에 대해 queryset filter를 적용합니다.
     type(optional) : 검색에 사용될 필드에 대해 lookup을 지정할 수 있으며, 지정하지 않을 경우 일치하는 항목을 검색합니다.
+      "fulltext"인 경우 full-text index(search.CreateFullTextIndex)로 검색하고 관련도 순으로 정렬합니다.
+      (index가 없는 경우 icontains로 검색, PostgreSQL text search config는 config로 지정하며 기본값은 "simple")
+      "prefix"인 경우 worker 별 in-memory index(search.PrefixIndex)에서 값 또는 값의 단어가 검색어로 시작하는 항목을 찾습니다.
+      한글은 자모 단위로 비교하므로 입력 중인 검색어(홍기)도 일치하며, 검색 결과는 limit(기본값 1000)개로 제한됩니다.
 
     Example:
       searches = {
@@ -23,6 +29,14 @@ class SearchQuerysetMixin:
               'fields': ['title', 'contents'],
               'type': 'icontains',
           },
+          'q': {
+              'fields': ['title', 'contents'],
+              'type': 'fulltext',
+          },
+          'autocomplete': {
+              'fields': ['title'],
+              'type': 'prefix',
+          },
       }
     """
     searches = {}
@@ -35,6 +49,7 @@ class SearchQuerysetMixin:
 
         query_params = self.request.query_params
         q = Q()
+        ranks = []
 
         for param, value in query_params.items():
             if param not in searches:
@@ -44,6 +59,24 @@ class SearchQuerysetMixin:
 
             fields = searches[param]["fields"]
             type_ = searches[param].get("type")
+
+            if type_ == "fulltext":
+                if result := fulltext_search(queryset, value, searches[param].get("config", DEFAULT_CONFIG)):
+                    condition, rank = result
+                    q &= Q(pk__in=condition)
+                    ranks.append(rank)
+                    continue
+
+                type_ = "icontains"
+
+            if type_ == "prefix":
+                limit = searches[param].get("limit", PREFIX_SEARCH_LIMIT)
+                if (pks := prefix_search(queryset, value, fields, limit)) is not None:
+                    q &= Q(pk__in=pks)
+                    continue
+
+                type_ = "icontains"
+
             for field in fields:
                 if type_:
                     lookup = f"{field}__{type_}"
@@ -59,16 +92,61 @@ class SearchQuerysetMixin:
         except FieldError as e:
             logger.error(f"Queryset filter error : {e}")
 
+        if ranks:
+            queryset = queryset.annotate(search_rank=sum(ranks[1:], ranks[0]))
+            queryset = queryset.order_by(F("search_rank").desc(), *(queryset.query.order_by or queryset.model._meta.ordering))
+
+        return queryset
+
+
+class RelatedQuerysetMixin:
+    """
+    serializer가 사용하는 relation(nested serializer, source 경로 포함)에 select_related / prefetch_related를 자동으로 적용합니다.
+    prefetch_related는 serializer가 사용하는 field만 only()로 조회하며, serializer class 별로 한 번만 분석합니다.
+    auto_related = False로 사용하지 않거나, get_related_lookups를 재정의하여 직접 지정할 수 있습니다.
+
+    Example:
+      def get_related_lookups(self, model):
+          select, prefetch = super().get_related_lookups(model)
+          return (*select, "author__profile"), prefetch
+    """
+    auto_related = True
+
+    def get_related_lookups(self, model):
+        """ (select_related, prefetch_related) 목록 """
+        try:
+            serializer_class = self.get_serializer_class()
+        except AssertionError:
+            return (), ()
+
+        return get_related_lookups(serializer_class, model)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        # values() 등 model instance를 반환하지 않는 queryset 제외
+        if not self.auto_related or queryset._fields is not None:
+            return queryset
+
+        select, prefetch = self.get_related_lookups(queryset.model)
+        if select:
+            queryset = queryset.select_related(*select)
+
+        # 직접 지정한 prefetch_related와 같은 lookup은 제외
+        lookups = {getattr(x, "prefetch_to", x) for x in queryset._prefetch_related_lookups}
+        if prefetch := [x for x in prefetch if getattr(x, "prefetch_to", x) not in lookups]:
+            queryset = queryset.prefetch_related(*prefetch)
+
         return queryset
 
 
-class GenericViewSet(SearchQuerysetMixin, viewsets.GenericViewSet):
+class GenericViewSet(RelatedQuerysetMixin, SearchQuerysetMixin, viewsets.GenericViewSet):
     pass
 
 
-class ReadOnlyModelViewSet(SearchQuerysetMixin, viewsets.ReadOnlyModelViewSet):
+class ReadOnlyModelViewSet(RelatedQuerysetMixin, SearchQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     pass
 
 
-class ModelViewSet(SearchQuerysetMixin, viewsets.ModelViewSet):
+class ModelViewSet(RelatedQuerysetMixin, SearchQuerysetMixin, viewsets.ModelViewSet):
     pass
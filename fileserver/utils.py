@@ -15,6 +15,8 @@ from django.http import Http404, HttpResponse, FileResponse, StreamingHttpRespon
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
+from base_project import metrics
+
 MAX_LOAD_VOLUME = settings.STREAM_MAX_LOAD_VOLUME
 RANGE_RE = re.compile(settings.STREAM_RANGE_HEADER_REGEX_PATTERN, re.I)
 
@@ -31,17 +33,22 @@ class Path(type(PathOrigin())):
 
 async def file_iterator(file_name, chunk_size=8192, offset=0, length=None):
     """iterate file chunk by chunk in generator mode"""
-    async with aiofiles.open(file_name, "rb") as f:
-        await f.seek(offset, os.SEEK_SET)
-        remaining = length
-        while True:
-            bytes_length = chunk_size if remaining is None else min(remaining, chunk_size)
-            data = await f.read(bytes_length)
-            if not data:
-                break
-            if remaining:
-                remaining -= len(data)
-            yield data
+    metrics.FILESERVER_ACTIVE_STREAMS.inc()
+    try:
+        async with aiofiles.open(file_name, "rb") as f:
+            await f.seek(offset, os.SEEK_SET)
+            remaining = length
+            while True:
+                bytes_length = chunk_size if remaining is None else min(remaining, chunk_size)
+                data = await f.read(bytes_length)
+                if not data:
+                    break
+                if remaining:
+                    remaining -= len(data)
+                metrics.FILESERVER_BYTES_SENT.inc(amount=len(data))
+                yield data
+    finally:
+        metrics.FILESERVER_ACTIVE_STREAMS.dec()
 
 
 async def dev(request, filename, offset=0, size=None, status=200, **kwargs):
@@ -1,8 +1,26 @@
-import multiprocessing
 from os import environ as env
 
-from base_project.settings import PROJECT_NAME
+# settings import 전에 설정, manage.py / uvicorn 단독 실행 / 테스트에서는 process 별 cache 사용
+env.setdefault("CACHE_SHARED_MEMORY", "1")
+
+from base_project.settings import PROJECT_NAME, IS_LOCAL, LOG_SOCKET, METRICS, WORKERS
 from base_project import startup
+from base_project import logserver
+from base_project import metrics
+
+env.setdefault('DJANGO_SETTINGS_MODULE', f'{PROJECT_NAME}.settings')
+log_writer = None
+
+
+# worker fork 전에 log writer process 실행
+def on_starting(server):
+    global log_writer
+    if LOG_SOCKET and not IS_LOCAL:
+        log_writer = logserver.start(LOG_SOCKET)
+
+    # 이전 실행에서 남은 metric 파일 삭제
+    if METRICS:
+        metrics.reset()
 
 
 # gunicorn으로 실행 시 초기 실행
@@ -10,12 +28,23 @@ def when_ready(server):
     startup.run()
 
 
+# 종료된 worker의 gauge 값은 합산에서 제외
+def child_exit(server, worker):
+    if METRICS:
+        metrics.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if log_writer:
+        logserver.stop(log_writer)
+
+
 host = env.get("GUNICORN_HOST", "0.0.0.0")
 port = int(env.get("GUNICORN_PORT", 8000))
 
 bind = f"{host}:{port}"
-# threads = multiprocessing.cpu_count() * 2
-workers = int(env.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# threads = os.cpu_count() * 2
+workers = WORKERS
 
 worker_class = f"{PROJECT_NAME}.workers.UvicornWorker"
 # preload_app = True